@@ -1,73 +1,141 @@
 # app.py
 from fastapi import FastAPI, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from typing import List
-import docx
-import PyPDF2
-import io
+import asyncio
 import json
+import random
+import threading
+import weakref
+from pathlib import Path
+import httpx
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
+from api.prompts import FUNDING_REQUIREMENTS, REQUIREMENTS_VERSION, generate_prompt
+from api.analysis_cache import AnalysisCache, is_cacheable
+from api import extraction
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Verify API key is loaded
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+if not OPENAI_API_KEY:
+    raise ValueError("OpenAI API key not found. Please check your .env file.")
+
+# OpenAI client: pooled connections, a cap on in-flight completions, a per-request
+# timeout and retries with jittered exponential backoff on 429/5xx and connection errors
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None  # e.g. a proxy or a local stub server
+OPENAI_MAX_IN_FLIGHT = int(os.getenv('OPENAI_MAX_IN_FLIGHT', '16'))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '60'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '4'))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv('OPENAI_RETRY_BASE_DELAY', '0.5'))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv('OPENAI_RETRY_MAX_DELAY', '20'))
+
+# One client and semaphore per event loop (uvicorn runs one loop per worker)
+_clients = weakref.WeakKeyDictionary()
+
+def get_client():
+    """Return the pooled AsyncOpenAI client and in-flight semaphore for the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _clients:
+        http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=OPENAI_MAX_IN_FLIGHT, max_keepalive_connections=OPENAI_MAX_IN_FLIGHT),
+        )
+        client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            http_client=http_client,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=0,  # retries happen in create_completion, outside the semaphore
+        )
+        _clients[loop] = (client, asyncio.Semaphore(OPENAI_MAX_IN_FLIGHT))
+    return _clients[loop]
+
+async def close_client():
+    entry = _clients.pop(asyncio.get_running_loop(), None)
+    if entry:
+        await entry[0].close()
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(get_cache)
+    yield
+    await close_client()
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
-# Initialize OpenAI client with API key from .env
-client = OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY')
-)
+def is_retryable(error) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
 
-# Verify API key is loaded
-if not os.getenv('OPENAI_API_KEY'):
-    raise ValueError("OpenAI API key not found. Please check your .env file.")
+def retry_delay(attempt: int, error) -> float:
+    """Full-jitter exponential backoff, but never sooner than the server's Retry-After."""
+    delay = random.uniform(0, min(OPENAI_RETRY_MAX_DELAY, OPENAI_RETRY_BASE_DELAY * 2 ** attempt))
+    response = getattr(error, "response", None)
+    try:
+        retry_after = float(response.headers.get("retry-after", 0)) if response is not None else 0
+    except ValueError:
+        retry_after = 0
+    return max(delay, min(retry_after, OPENAI_RETRY_MAX_DELAY))
+
+async def create_completion(**params):
+    """``chat.completions.create`` with the in-flight limit and retries."""
+    client, in_flight = get_client()
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            async with in_flight:
+                return await client.chat.completions.create(**params)
+        except openai.OpenAIError as e:
+            if attempt == OPENAI_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = retry_delay(attempt, e)
+        # ✅ Back off without holding a slot
+        await asyncio.sleep(delay)
+
+OPENAI_MODEL = "gpt-4-turbo-preview"  # or another appropriate model
+
+# Cache analyses so re-uploads of the same form skip the remote call (empty path disables it).
+# The default is the same file Django uses (settings.ANALYSIS_CACHE_PATH), whatever the working directory.
+BASE_DIR = Path(__file__).resolve().parent.parent
+ANALYSIS_CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH', str(BASE_DIR / 'analysis_cache.sqlite3'))
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Open the analysis cache on first use; None when ANALYSIS_CACHE_PATH is empty."""
+    global _cache
+    with _cache_lock:
+        if _cache is None and ANALYSIS_CACHE_PATH:
+            _cache = AnalysisCache(
+                ANALYSIS_CACHE_PATH,
+                ttl=int(os.getenv('ANALYSIS_CACHE_TTL', str(7 * 24 * 3600))),
+                max_entries=int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '1000')),
+            )
+            _cache.purge_stale(REQUIREMENTS_VERSION)
+        return _cache
 
-FUNDING_REQUIREMENTS = """
-Please analyze this appropriation form against these requirements:
-1. Must specify if funding is one-time or recurring
-2. All form fields must be filled out
-3. Must show alternative funding sources
-4. Must benefit a large number of people
-5. No transportation or gas money reimbursements allowed
-6. Must have specific date for spending
-7. Must include campus advertising plan
-
-For each requirement, indicate if it is met or not met. If not met, explain what needs to be added.
-Format your response as a JSON object with 'issues' and 'recommendations' arrays.
-"""
-
-def extract_text(file_content: bytes, file_type: str) -> str:
-    """Extract text from various file formats."""
-    if file_type == "application/pdf":
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        text = " ".join(page.extract_text() for page in pdf_reader.pages)
-    elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        doc = docx.Document(io.BytesIO(file_content))
-        text = " ".join(paragraph.text for paragraph in doc.paragraphs)
-    else:  # Assume text file
-        text = file_content.decode('utf-8')
-    return text
-
-def generate_prompt(form_content: str) -> str:
-    """Generate the prompt for the AI model."""
-    return f"""You are an assistant that analyzes funding request forms. 
-Please analyze the following appropriation form content:
-
-{form_content}
-
-{FUNDING_REQUIREMENTS}
-
-Remember to format your response as a valid JSON object with 'issues' and 'recommendations' arrays."""
+def extract_text(file, file_type: str) -> str:
+    """Extract text from various file formats without reading the upload into memory."""
+    return extraction.extract_text(
+        file,
+        file_type,
+        char_budget=int(os.getenv('EXTRACTION_CHAR_BUDGET', '200000')),
+        parallel_pages=int(os.getenv('EXTRACTION_PARALLEL_PAGES', '30')),
+        workers=int(os.getenv('EXTRACTION_WORKERS', '0')),
+    )
 
 async def analyze_with_openai(prompt: str) -> dict:
     """Send prompt to OpenAI and get analysis."""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",  # or another appropriate model
+        response = await create_completion(
+            model=OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "You are a funding request analyzer that responds in JSON format."},
                 {"role": "user", "content": prompt}
@@ -105,14 +173,21 @@ async def analyze_with_openai(prompt: str) -> dict:
 async def analyze_form(file: UploadFile = File(...)):
     """Endpoint to analyze uploaded funding request forms."""
     try:
-        # Read and extract text from the uploaded file
-        content = await file.read()
-        text = extract_text(content, file.content_type)
-        
+        # Extract text from the uploaded file (blocking work stays off the event loop)
+        text = await run_in_threadpool(extract_text, file.file, file.content_type)
+
+        cache = await run_in_threadpool(get_cache)
+        if cache:
+            cached = await run_in_threadpool(cache.get, text, REQUIREMENTS_VERSION, OPENAI_MODEL)
+            if cached is not None:
+                return cached
+
         # Generate prompt and get OpenAI analysis
         prompt = generate_prompt(text)
         analysis = await analyze_with_openai(prompt)
-        
+
+        if cache and is_cacheable(analysis):
+            await run_in_threadpool(cache.set, text, REQUIREMENTS_VERSION, OPENAI_MODEL, analysis)
         return analysis
         
     except Exception as e:
@@ -124,4 +199,4 @@ async def analyze_form(file: UploadFile = File(...)):
 # Additional endpoint for health check
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "api_key_configured": bool(os.getenv('OPENAI_API_KEY'))}
+    return {"status": "healthy", "api_key_configured": bool(OPENAI_API_KEY)}
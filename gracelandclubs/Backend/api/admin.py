@@ -1,7 +1,16 @@
 from django.contrib import admin
-from .models import  User, Clubs, Event # Fix import
+from .models import  User, Clubs, Event, EventRecurrence, EventException, AnalysisJob, Membership, NutritionData # Fix import
 
 # Register models in Django Admin
 admin.site.register(User)
 admin.site.register(Clubs)
-admin.site.register(Event)
+admin.site.register(Membership)
+admin.site.register(EventRecurrence)
+admin.site.register(EventException)
+admin.site.register(AnalysisJob)
+admin.site.register(NutritionData)
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_select_related = ["club"]  # ✅ Event.__str__ shows the club name
@@ -0,0 +1,110 @@
+"""Form-analysis pipeline shared by the analyze-form endpoints."""
+import asyncio
+
+from django.conf import settings
+
+from .analysis_cache import AnalysisCache, is_cacheable
+from .batching import get_scheduler
+from .chunking import analyze_in_chunks, count_tokens
+from .executor import run_blocking
+from .inference import ModelLoader, model_id, parse_analysis
+from .model_server import ModelServerClient
+from .prompts import REQUIREMENTS_VERSION, generate_prompt
+
+_analysis_cache = None
+
+
+def get_analysis_cache():
+    """Return the shared analysis cache, or None when ANALYSIS_CACHE_PATH is unset."""
+    global _analysis_cache
+    if _analysis_cache is None and settings.ANALYSIS_CACHE_PATH:
+        _analysis_cache = AnalysisCache(
+            settings.ANALYSIS_CACHE_PATH,
+            ttl=settings.ANALYSIS_CACHE_TTL,
+            max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+        )
+        _analysis_cache.purge_stale(REQUIREMENTS_VERSION)
+    return _analysis_cache
+
+
+def generate_response(prompt):
+    """Run the model on a prompt, via the shared model server when one is configured."""
+    if settings.MODEL_SERVER_SOCKET:
+        return ModelServerClient().generate(prompt)
+    return get_scheduler().submit(prompt)
+
+
+def generate_batch_response(prompts, **options):
+    """Run the model on a batch of prompts, via the shared model server when one is configured.
+
+    In this process the prompts go through the batch scheduler, like single prompts.
+    """
+    if settings.MODEL_SERVER_SOCKET:
+        return ModelServerClient().generate_batch(prompts, **options)
+    return get_scheduler().submit_many(prompts, options=options)
+
+
+def cached_analysis(text):
+    cache = get_analysis_cache()
+    return cache.get(text, REQUIREMENTS_VERSION, model_id()) if cache else None
+
+
+def store_analysis(text, analysis):
+    cache = get_analysis_cache()
+    if cache and is_cacheable(analysis):
+        cache.set(text, REQUIREMENTS_VERSION, model_id(), analysis)
+
+
+def single_prompt(text):
+    """The single JSON prompt for a form, or None when it does not fit the model's context."""
+    tokenizer = ModelLoader.get_tokenizer()
+    max_length = min(settings.ANALYZE_MAX_INPUT_TOKENS, tokenizer.model_max_length)
+    prompt = generate_prompt(text)
+    return prompt if count_tokens(tokenizer, prompt) <= max_length else None
+
+
+def analyze_chunked(text):
+    tokenizer = ModelLoader.get_tokenizer()
+    max_length = min(settings.ANALYZE_MAX_INPUT_TOKENS, tokenizer.model_max_length)
+    # ✅ The scheduler sizes batches itself, so in-process checks are all queued at once
+    batch_size = settings.ANALYZE_MAX_BATCH_SIZE if settings.MODEL_SERVER_SOCKET else None
+    return analyze_in_chunks(text, tokenizer, generate_batch_response, max_length, batch_size=batch_size)
+
+
+def analyze_form_text(text):
+    """Analyze extracted form text, serving and filling the analysis cache.
+
+    Forms whose prompt fits the model's context get the single JSON prompt;
+    longer forms are chunked and checked requirement by requirement.
+    """
+    cached = cached_analysis(text)
+    if cached is not None:
+        return cached
+
+    prompt = single_prompt(text)
+    analysis = analyze_chunked(text) if prompt is None else parse_analysis(generate_response(prompt))
+    store_analysis(text, analysis)
+    return analysis
+
+
+async def aanalyze_form_text(text):
+    """``analyze_form_text`` for async views.
+
+    Blocking steps run in the bounded executor. A single prompt for the
+    in-process model awaits its batch's Future, so analyses waiting on the
+    batch scheduler do not hold a thread.
+    """
+    cached = await run_blocking(cached_analysis, text)
+    if cached is not None:
+        return cached
+
+    prompt = await run_blocking(single_prompt, text)
+    if prompt is None:
+        analysis = await run_blocking(analyze_chunked, text)
+    elif settings.MODEL_SERVER_SOCKET:
+        analysis = parse_analysis(await run_blocking(generate_response, prompt))
+    else:
+        scheduler = get_scheduler()
+        analysis = parse_analysis(await asyncio.wait_for(asyncio.wrap_future(scheduler.enqueue(prompt)), scheduler.timeout))
+    await run_blocking(store_analysis, text, analysis)
+    return analysis
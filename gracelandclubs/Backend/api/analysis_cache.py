@@ -0,0 +1,110 @@
+"""Content-addressed cache for funding-form analyses.
+
+Results are keyed on a hash of the normalized form text, the requirements
+prompt version and the model id, and stored in a small SQLite file with TTL
+and LRU eviction. This module does not depend on Django so the FastAPI
+checker can share it.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+ERROR_PREFIXES = ("Error parsing model response", "Error calling OpenAI API", "Error processing form")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-extracted copies of the same form hash the same."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(text: str, prompt_version: str, model_id: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_text(text), prompt_version, model_id):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_cacheable(analysis) -> bool:
+    """Only cache real analyses, not the error placeholders the analyzers return."""
+    if not isinstance(analysis, dict):
+        return False
+    issues = analysis.get("issues") or []
+    return not any(str(issue).startswith(ERROR_PREFIXES) for issue in issues)
+
+
+class AnalysisCache:
+    """SQLite-backed analysis cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=1000):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                " key TEXT PRIMARY KEY,"
+                " prompt_version TEXT NOT NULL,"
+                " model_id TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_accessed_at ON analyses (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_prompt_version ON analyses (prompt_version)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, text, prompt_version, model_id):
+        """Return the cached analysis, or None on a miss or an expired entry."""
+        key = cache_key(text, prompt_version, model_id)
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute("SELECT result, created_at FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and row[1] + self.ttl < now:
+                conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, text, prompt_version, model_id, analysis):
+        key = cache_key(text, prompt_version, model_id)
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, prompt_version, model_id, result, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, prompt_version, model_id, json.dumps(analysis), now, now),
+            )
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM analyses WHERE key IN ("
+                    " SELECT key FROM analyses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def purge_stale(self, prompt_version):
+        """Drop expired entries and entries made with a different requirements prompt."""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM analyses WHERE prompt_version != ? OR created_at < ?",
+                (prompt_version, time.time() - self.ttl if self.ttl else 0),
+            )
+        return cursor.rowcount
+
+    def clear(self):
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM analyses")
+        return cursor.rowcount
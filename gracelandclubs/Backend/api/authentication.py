@@ -0,0 +1,145 @@
+"""JWT authentication that avoids a users-table query on most requests.
+
+``CachedJWTAuthentication`` validates tokens exactly like simplejwt's
+``JWTAuthentication`` but resolves the user in one of two cheaper ways:
+
+* Safe (GET/HEAD/OPTIONS) requests to views that set ``stateless_reads = True``
+  get a ``TokenUser`` built from the token's claims, with no query at all.
+  Only views that never read user fields beyond the id should opt in.
+* Every other request looks the user up in a short-lived in-process cache of
+  user rows. ``api.signals`` drops a user's entry whenever the user is saved or
+  deleted; other processes see the change within ``AUTH_USER_CACHE_SECONDS``.
+
+``aauthenticate`` does the same for the plain async Django views, which DRF
+does not support.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """A small thread-safe LRU of user rows with a TTL.
+
+    It stores field values rather than model instances, so every request gets
+    its own fresh ``User`` object and no per-instance caches leak between requests.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.field_names = None
+
+    def get(self, user_id):
+        if not self.ttl:
+            return None
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            values, expires = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, self.field_names, values)
+
+    def set(self, user):
+        if not self.ttl:
+            return
+        model = type(user)
+        if self.field_names is None:
+            self.field_names = [field.attname for field in model._meta.concrete_fields]
+        values = tuple(getattr(user, name) for name in self.field_names)
+        with self.lock:
+            self.entries[user.pk] = (values, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user.pk)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SECONDS, settings.AUTH_USER_CACHE_MAX_ENTRIES)
+
+
+def check_user(user, validated_token):
+    """The checks simplejwt runs after loading a user, applied to cached users too."""
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        self.stateless = (
+            settings.AUTH_STATELESS_READS
+            and request.method in SAFE_METHODS
+            and getattr(request.parser_context.get("view"), "stateless_reads", False)
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.stateless:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(_("Token contained no recognizable user identification"))
+            return TokenUser(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+        else:
+            check_user(user, validated_token)
+        return user
+
+
+async def aauthenticate(request, stateless=False):
+    """Authenticate an async view's request from its JWT.
+
+    Returns the user, or None when no token was sent. Raises
+    ``AuthenticationFailed`` for an invalid token. ``stateless`` makes safe
+    requests use the token's claims, like views with ``stateless_reads``.
+    A user forced by DRF's ``APIClient.force_authenticate`` is returned as
+    DRF's own ``Request`` would.
+    """
+    forced = getattr(request, "_force_auth_user", None)
+    if forced is not None:
+        return forced
+
+    backend = CachedJWTAuthentication()
+    header = backend.get_header(request)
+    raw_token = backend.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+
+    validated_token = backend.get_validated_token(raw_token)
+    backend.stateless = stateless and settings.AUTH_STATELESS_READS and request.method in SAFE_METHODS
+    return await sync_to_async(backend.get_user)(validated_token)
@@ -0,0 +1,158 @@
+"""Dynamic micro-batching of model generation requests.
+
+Requests that arrive within a short window (or until the batch is full) are
+padded together and run through a single ``generate`` call. Prompts queued
+with different generation options (e.g. the short greedy verdicts of chunked
+analyses) share the window but are generated in separate calls.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .inference import generate_batch
+
+
+class BatchMetrics:
+    """Thread-safe counters for tuning the batch window and size."""
+
+    def __init__(self, max_samples=1000):
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.max_queue_depth = 0
+        self._batch_sizes = []
+        self._wait_times = []
+
+    def record_batch(self, size, wait_times, queue_depth, failed=False):
+        with self._lock:
+            self.requests += size
+            self.batches += 1
+            self.failed_batches += int(failed)
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            self._batch_sizes = (self._batch_sizes + [size])[-self._max_samples:]
+            self._wait_times = (self._wait_times + list(wait_times))[-self._max_samples:]
+
+    def snapshot(self, queue_depth=0):
+        with self._lock:
+            waits = sorted(self._wait_times)
+            sizes = self._batch_sizes
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "queue_depth": queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0,
+                "max_batch_size": max(sizes, default=0),
+                "avg_wait_ms": round(1000 * sum(waits) / len(waits), 2) if waits else 0,
+                "p95_wait_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0,
+            }
+
+
+class BatchScheduler:
+    """Collect prompts from many threads and generate them in padded batches."""
+
+    def __init__(self, generate_fn=generate_batch, window=0.02, max_batch_size=8, timeout=120.0):
+        self.generate_fn = generate_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.metrics = BatchMetrics()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._worker.start()
+
+    def enqueue(self, prompt, options=None):
+        """Queue a prompt and return a Future for its result; async callers await it without a thread.
+
+        ``options`` are generation kwargs for this prompt, passed on to ``generate_fn``.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((prompt, future, time.monotonic(), tuple(sorted((options or {}).items()))))
+        return future
+
+    def submit(self, prompt, timeout=None, options=None):
+        """Queue a prompt and block until its batch has been generated (or ``self.timeout`` passes)."""
+        return self.enqueue(prompt, options).result(timeout=self.timeout if timeout is None else timeout)
+
+    def submit_many(self, prompts, timeout=None, options=None):
+        """Queue several prompts at once and block until all are generated, within one timeout."""
+        futures = [self.enqueue(prompt, options) for prompt in prompts]
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        return [future.result(timeout=max(0, deadline - time.monotonic())) for future in futures]
+
+    def stats(self):
+        return self.metrics.snapshot(queue_depth=self._queue.qsize())
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            collected = self._collect()
+            queue_depth = self._queue.qsize() + len(collected)
+            groups = {}
+            for item in collected:
+                groups.setdefault(item[3], []).append(item)
+            for options, batch in groups.items():
+                self._generate(batch, dict(options), queue_depth)
+
+    def _generate(self, batch, options, queue_depth):
+        started = time.monotonic()
+        prompts = [prompt for prompt, _, _, _ in batch]
+        waits = [started - enqueued for _, _, enqueued, _ in batch]
+
+        try:
+            results = self.generate_fn(prompts, **options)
+        except Exception as e:
+            self.metrics.record_batch(len(batch), waits, queue_depth, failed=True)
+            for _, future, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        results = list(results)
+        self.metrics.record_batch(len(batch), waits, queue_depth, failed=len(results) < len(batch))
+        for (_, future, _, _), result in zip(batch, results):
+            future.set_result(result)
+        # ✅ A backend that returns too few outputs must not leave callers waiting forever
+        for _, future, _, _ in batch[len(results):]:
+            future.set_exception(RuntimeError(f"Model returned {len(results)} outputs for {len(batch)} prompts."))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler configured from settings."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BatchScheduler(
+                window=settings.ANALYZE_BATCH_WINDOW_MS / 1000,
+                max_batch_size=settings.ANALYZE_MAX_BATCH_SIZE,
+                timeout=settings.ANALYZE_GENERATE_TIMEOUT,
+            )
+        return _scheduler
@@ -0,0 +1,107 @@
+"""Token-budget-aware chunking and map-reduce analysis for long forms.
+
+Forms whose prompt would not fit the model's context are split into
+section-aligned chunks under the token limit. Every chunk is checked against
+every funding requirement with a short yes/no prompt, all in batched
+``generate`` calls, and the per-requirement verdicts are merged back into the
+usual ``issues``/``recommendations`` JSON.
+"""
+import re
+
+from .prompts import REQUIREMENT_CHECKS, generate_check_prompt
+
+# Verdicts are a single word, so decode greedily and stop almost immediately.
+VERDICT_OPTIONS = {"max_new_tokens": 3, "do_sample": False}
+
+_SECTION_BREAK = re.compile(r"\n\s*\n|\n(?=\s*(?:\d+[.)]\s|[A-Z][A-Za-z /&-]{2,40}:))")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+")
+
+
+def split_sections(text):
+    """Split form text on blank lines, numbered items and ``Heading:`` lines."""
+    return [section.strip() for section in _SECTION_BREAK.split(text) if section.strip()]
+
+
+def count_tokens(tokenizer, text):
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def _fit(text, tokenizer, max_tokens):
+    """Yield ``(piece, token_count)`` pairs, each no longer than ``max_tokens``."""
+    tokens = count_tokens(tokenizer, text)
+    if tokens <= max_tokens:
+        yield text, tokens
+        return
+
+    sentences = [s for s in _SENTENCE_BREAK.split(text) if s]
+    if len(sentences) > 1:
+        for sentence in sentences:
+            yield from _fit(sentence, tokenizer, max_tokens)
+        return
+
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    for start in range(0, len(ids), max_tokens):
+        piece = ids[start:start + max_tokens]
+        yield tokenizer.decode(piece, skip_special_tokens=True), len(piece)
+
+
+def chunk_text(text, tokenizer, max_tokens):
+    """Pack whole sections into chunks of at most ``max_tokens`` tokens."""
+    chunks, current, current_tokens = [], [], 0
+    for section in split_sections(text):
+        for piece, tokens in _fit(section, tokenizer, max_tokens):
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def chunk_budget(tokenizer, max_length):
+    """Tokens left for the form excerpt once the longest check prompt is accounted for."""
+    overhead = max(
+        len(tokenizer(generate_check_prompt("", question))["input_ids"])
+        for _, question, _, _ in REQUIREMENT_CHECKS
+    )
+    return max_length - overhead
+
+
+def parse_verdict(answer):
+    return answer.strip().lower().startswith("yes")
+
+
+def merge_verdicts(verdicts):
+    """Combine per-requirement lists of per-chunk verdicts into the analysis JSON."""
+    issues, recommendations = [], []
+    for (requirement, _, mode, recommendation), answers in zip(REQUIREMENT_CHECKS, verdicts):
+        met = any(answers) if mode == "any" else not any(answers)
+        if not met:
+            issues.append(f"Requirement not met: {requirement}")
+            recommendations.append(recommendation)
+    return {"issues": issues, "recommendations": recommendations}
+
+
+def analyze_in_chunks(text, tokenizer, generate_batch_fn, max_length, batch_size=8):
+    """Map every requirement check over every chunk, then reduce to one analysis.
+
+    ``batch_size=None`` hands every prompt to ``generate_batch_fn`` in one call.
+    """
+    chunks = chunk_text(text, tokenizer, chunk_budget(tokenizer, max_length))
+    prompts = [
+        generate_check_prompt(chunk, question)
+        for _, question, _, _ in REQUIREMENT_CHECKS
+        for chunk in chunks
+    ]
+
+    answers, batch_size = [], batch_size or len(prompts)
+    for start in range(0, len(prompts), batch_size):
+        answers.extend(generate_batch_fn(prompts[start:start + batch_size], **VERDICT_OPTIONS))
+
+    verdicts = [
+        [parse_verdict(answer) for answer in answers[i * len(chunks):(i + 1) * len(chunks)]]
+        for i in range(len(REQUIREMENT_CHECKS))
+    ]
+    return merge_verdicts(verdicts)
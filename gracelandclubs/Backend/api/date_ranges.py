@@ -0,0 +1,67 @@
+"""Half-open datetime windows for calendar queries.
+
+Filtering with ``date__year``/``date__month`` makes the database extract parts
+of every row's date (in the current time zone under ``USE_TZ``), which no index
+can serve. Comparing ``start <= date < end`` against aware datetimes instead
+lets SQLite walk the ``(club, date)`` and ``date`` indexes.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def month_range(year, month):
+    """Return the aware ``[start, end)`` datetimes of a calendar month in the current time zone."""
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError("Month must be between 1 and 12.")
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return _aware(start), _aware(end)
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def parse_bound(value):
+    """Parse an ISO date or datetime; dates mean midnight in the current time zone."""
+    day = _parse_day(value)
+    parsed = datetime.combine(day, datetime.min.time()) if day else parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"'{value}' is not an ISO date or datetime.")
+    return _aware(parsed)
+
+
+def parse_range(start, end):
+    """Validate a ``start``/``end`` query window; ``end`` is exclusive.
+
+    A bare ``end`` date covers that whole day, so ``?start=2025-03-01&end=2025-03-07``
+    is the visible week including the 7th.
+    """
+    if not start or not end:
+        raise ValueError("Both 'start' and 'end' are required.")
+    start_at = parse_bound(start)
+    end_at = parse_bound(end)
+    if _parse_day(end):
+        end_at += timedelta(days=1)
+
+    if end_at <= start_at:
+        raise ValueError("'end' must be after 'start'.")
+    if end_at - start_at > timedelta(days=settings.EVENT_RANGE_MAX_DAYS):
+        raise ValueError(f"Ranges may span at most {settings.EVENT_RANGE_MAX_DAYS} days.")
+    return start_at, end_at
+
+
+def in_range(start, end):
+    """Lookup kwargs for a sargable ``start <= date < end`` filter."""
+    return {"date__gte": start, "date__lt": end}
@@ -0,0 +1,64 @@
+"""PRAGMAs applied to the backend's SQLite connections.
+
+Django's connections get them from a ``connection_created`` receiver; the
+ad-hoc ``sqlite3`` connections (``dbsetup.py``, ``api.query_engine``) call
+``tune()`` themselves so every connection to a database file behaves the same
+way. ``api.analysis_cache`` stays free of Django for the FastAPI checker and
+only sets WAL and a busy timeout on its own file.
+
+* ``journal_mode=WAL`` lets readers run alongside the single writer instead of
+  blocking on it. The mode is stored in the database file, so read-only
+  connections skip it.
+* ``busy_timeout`` makes a blocked writer wait for the lock instead of failing
+  at once with ``database is locked``.
+* ``synchronous=NORMAL`` is durable across application crashes in WAL mode and
+  saves an fsync per commit.
+* ``mmap_size`` and ``cache_size`` keep hot pages in memory.
+
+Values come from the ``SQLITE_*`` settings, or the defaults below outside Django.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+    "SQLITE_CACHE_SIZE_KB": 64 * 1024,
+}
+
+
+def _option(name):
+    if settings.configured:
+        return getattr(settings, name, DEFAULTS[name])
+    return DEFAULTS[name]
+
+
+def pragmas(read_only=False):
+    statements = []
+    if not read_only and _option("SQLITE_JOURNAL_MODE"):
+        statements.append(f"PRAGMA journal_mode = {_option('SQLITE_JOURNAL_MODE')}")
+    statements += [
+        f"PRAGMA busy_timeout = {int(_option('SQLITE_BUSY_TIMEOUT_MS'))}",
+        f"PRAGMA synchronous = {_option('SQLITE_SYNCHRONOUS')}",
+        f"PRAGMA mmap_size = {int(_option('SQLITE_MMAP_SIZE'))}",
+        # ✅ A negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{int(_option('SQLITE_CACHE_SIZE_KB'))}",
+    ]
+    return statements
+
+
+def tune(conn, read_only=False):
+    """Apply the PRAGMAs to a ``sqlite3`` connection and return it."""
+    for statement in pragmas(read_only):
+        conn.execute(statement).fetchall()
+    return conn
+
+
+@receiver(connection_created)
+def tune_django_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        # ✅ On the raw connection, so the PRAGMAs don't show up in query logs or counts
+        tune(connection.connection)
@@ -0,0 +1,102 @@
+"""Cache of the monthly event feeds behind the calendar.
+
+A month's feed is cached per scope: ``"all"`` for ``/api/events/`` and the
+club id for a club's calendar. Every (scope, year, month) has a version stamp
+in the cache and entries are keyed by it, so invalidating a month just
+replaces its stamp; entries from the old stamp are never read again and age
+out. Signals in ``api.signals`` invalidate exactly the months an event write
+touches, in both the club's scope and ``"all"``. Recurring series can reach
+any month, so each scope also has a series stamp that changes whenever one of
+its series, or their exceptions, changes. Each entry carries an ETag so an
+unchanged month can be answered with 304.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+ALL = "all"
+
+
+def event_month(date):
+    """The (year, month) a dated event is listed under, in the current time zone."""
+    if date is None:
+        return None
+    local = timezone.localtime(date)
+    return local.year, local.month
+
+
+def _version_key(scope, year, month):
+    return f"event-feed:version:{scope}:{year}:{month}"
+
+
+def invalidate_month(club_id, year, month):
+    """Drop the cached feeds of one month for a club and for all events."""
+    stamp = time.time_ns()
+    cache.set_many({_version_key(scope, year, month): stamp for scope in (ALL, club_id)}, None)
+
+
+def _series_key(scope):
+    return f"event-feed:series:{scope}"
+
+
+def invalidate_series(club_id):
+    """Drop every cached month of a club (and of all events) after a recurring series changes."""
+    stamp = time.time_ns()
+    cache.set_many({_series_key(scope): stamp for scope in (ALL, club_id)}, None)
+
+
+def _stamp(key):
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def invalidate_dates(club_id, dates):
+    for month in {event_month(date) for date in dates} - {None}:
+        invalidate_month(club_id, *month)
+
+
+def _feed_key(scope, year, month, variant, version):
+    digest = hashlib.md5(variant.encode("utf-8")).hexdigest()
+    return f"event-feed:{scope}:{year}:{month}:{version}:{digest}"
+
+
+def _feed_entry(rows, next_cursor):
+    body = json.dumps([rows, next_cursor], cls=DjangoJSONEncoder, sort_keys=True)
+    return {"rows": rows, "next_cursor": next_cursor, "etag": f'"{hashlib.md5(body.encode()).hexdigest()}"'}
+
+
+def cached_feed(scope, year, month, variant, build):
+    """Return a month's feed entry ``{"rows", "next_cursor", "etag"}``, building it on a miss.
+
+    ``variant`` distinguishes pages of the same month (limit and cursor);
+    ``build()`` returns ``(rows, next_cursor)``.
+    """
+    version = f"{_stamp(_version_key(scope, year, month))}.{_stamp(_series_key(scope))}"
+    key = _feed_key(scope, year, month, variant, version)
+
+    entry = cache.get(key)
+    if entry is None:
+        entry = _feed_entry(*build())
+        cache.set(key, entry, settings.EVENT_FEED_CACHE_SECONDS)
+    return entry
+
+
+async def acached_feed(scope, year, month, variant, build):
+    """``cached_feed`` for async views; ``build`` is a coroutine function."""
+    stamps = [await cache.aget_or_set(key, time.time_ns, None) for key in (_version_key(scope, year, month), _series_key(scope))]
+    key = _feed_key(scope, year, month, variant, ".".join(map(str, stamps)))
+
+    entry = await cache.aget(key)
+    if entry is None:
+        entry = _feed_entry(*await build())
+        await cache.aset(key, entry, settings.EVENT_FEED_CACHE_SECONDS)
+    return entry
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    return header.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
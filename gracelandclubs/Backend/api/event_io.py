@@ -0,0 +1,231 @@
+"""Bulk event import and streaming export (CSV, JSON and iCalendar).
+
+Imports are parsed into plain dicts, validated together and written with one
+``bulk_create`` inside a transaction. ``bulk_create`` does not send signals,
+so the importer invalidates the event feed cache for the months it touched.
+Exports stream rows from a ``values()`` iterator as CSV or ``.ics``.
+"""
+import csv
+import io
+import json
+import re
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import event_cache
+from .date_ranges import parse_bound
+from .models import Event
+from .serializers import EventImportSerializer
+
+CSV, JSON, ICS = "csv", "json", "ics"
+FORMATS = (CSV, JSON, ICS)
+
+FIELDS = ["name", "description", "date", "image_url"]
+
+_ESCAPE = re.compile(r"\\(.)")
+_CONTENT_TYPES = {"text/csv": CSV, "application/json": JSON, "text/calendar": ICS}
+
+
+class EventImportError(ValueError):
+    """Raised for an import file that cannot be read or is too large."""
+
+
+def detect_format(name="", content_type=""):
+    """Guess the import format from a file name or content type."""
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if extension in FORMATS:
+        return extension
+    return _CONTENT_TYPES.get(content_type.split(";")[0].strip())
+
+
+# --- Parsing ---
+
+def parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    return [{field: (row.get(field) or "").strip() for field in FIELDS} for row in reader]
+
+
+def parse_json(text):
+    rows = json.loads(text) if isinstance(text, str) else text
+    if isinstance(rows, dict):
+        rows = rows.get("events")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Expected a list of event objects.")
+    return [{field: row.get(field) for field in FIELDS} for row in rows]
+
+
+def _unfold(text):
+    """Join RFC 5545 folded lines (continuations start with a space or tab)."""
+    lines = []
+    for line in text.splitlines():
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def _unescape(value):
+    return _ESCAPE.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+
+def _ics_datetime(value, params):
+    """Turn a DTSTART value into an aware datetime (all-day dates start at local midnight)."""
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return timezone.make_aware(datetime.strptime(value[:8], "%Y%m%d"))
+    parsed = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return parsed.replace(tzinfo=dt_timezone.utc)
+    if "TZID" in params:
+        try:
+            return parsed.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone '{params['TZID']}'.")
+    return timezone.make_aware(parsed)
+
+
+def parse_ics(text):
+    rows, event = [], None
+    for line in _unfold(text):
+        head, _, value = line.partition(":")
+        prop, *raw_params = head.split(";")
+        prop = prop.upper()
+        params = dict(param.partition("=")[::2] for param in raw_params)
+
+        if prop == "BEGIN" and value.upper() == "VEVENT":
+            event = dict.fromkeys(FIELDS, "")
+        elif prop == "END" and value.upper() == "VEVENT" and event is not None:
+            rows.append(event)
+            event = None
+        elif event is not None:
+            if prop == "SUMMARY":
+                event["name"] = _unescape(value)
+            elif prop == "DESCRIPTION":
+                event["description"] = _unescape(value)
+            elif prop == "DTSTART":
+                event["date"] = _ics_datetime(value, params)
+            elif prop in ("URL", "IMAGE") and not event["image_url"]:
+                event["image_url"] = value
+    return rows
+
+
+def parse_events(payload, fmt):
+    parser = {CSV: parse_csv, JSON: parse_json, ICS: parse_ics}[fmt]
+    try:
+        return parser(payload)
+    except (ValueError, csv.Error) as e:
+        raise EventImportError(f"Could not read {fmt.upper()} events: {e}")
+
+
+# --- Importing ---
+
+def _clean(row):
+    row = dict(row)
+    if isinstance(row.get("date"), str):
+        row["date"] = parse_bound(row["date"]) if row["date"].strip() else None
+    if not row.get("image_url"):
+        row["image_url"] = None
+    row["description"] = row.get("description") or ""
+    return row
+
+
+def import_events(club, rows):
+    """Validate every row, then insert them all in one transaction.
+
+    Returns ``(created_count, errors)``; ``errors`` maps row numbers (from 1)
+    to field errors, and nothing is written if any row is invalid.
+    """
+    if len(rows) > settings.EVENT_IMPORT_MAX_ROWS:
+        raise EventImportError(f"Imports are limited to {settings.EVENT_IMPORT_MAX_ROWS} events.")
+
+    events, errors = [], {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            row = _clean(row)
+        except ValueError as e:
+            errors[number] = {"date": [str(e)]}
+            continue
+        serializer = EventImportSerializer(data=row)
+        if serializer.is_valid():
+            events.append(Event(club=club, **serializer.validated_data))
+        else:
+            errors[number] = serializer.errors
+    if errors:
+        return 0, errors
+
+    with transaction.atomic():
+        Event.objects.bulk_create(events, batch_size=500)
+        # ✅ bulk_create skips post_save, so refresh the cached months here
+        transaction.on_commit(lambda: event_cache.invalidate_dates(club.id, [event.date for event in events]))
+    return len(events), {}
+
+
+# --- Exporting ---
+
+def _ics_escape(value):
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    """Fold a content line to 75 octets as RFC 5545 asks."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, current = [], b""
+    for char in line:
+        piece = char.encode("utf-8")
+        if len(current) + len(piece) > (75 if not parts else 74):
+            parts.append(current.decode("utf-8"))
+            current = b""
+        current += piece
+    parts.append(current.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _uid(row):
+    """Occurrences of a recurring event share its id, so their UIDs also carry the occurrence."""
+    if row.get("recurring"):
+        return f"event-{row['id']}-{row['original_date'].astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}"
+    return f"event-{row['id']}"
+
+
+def export_ics(rows, host="gracelandclubs"):
+    """Yield an iCalendar document for event ``values()`` rows."""
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Graceland Clubs//Events//EN\r\n"
+    for row in rows:
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{_uid(row)}@{host}",
+            f"DTSTAMP:{stamp}",
+            f"SUMMARY:{_ics_escape(row['name'])}",
+            f"DESCRIPTION:{_ics_escape(row['description'])}",
+        ]
+        if row["date"]:
+            lines.append(f"DTSTART:{row['date'].astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}")
+        if row["image_url"]:
+            lines.append(f"URL:{row['image_url']}")
+        if row.get("club_name"):
+            lines.append(f"CATEGORIES:{_ics_escape(row['club_name'])}")
+        lines.append("END:VEVENT")
+        yield "".join(_ics_fold(line) for line in lines)
+    yield "END:VCALENDAR\r\n"
+
+
+def export_csv(rows):
+    """Yield CSV text for event ``values()`` rows, a header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = ["id", *FIELDS, "club_name"]
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([row["date"].isoformat() if column == "date" and row["date"] else row[column]
+                         for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
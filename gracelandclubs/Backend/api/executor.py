@@ -0,0 +1,35 @@
+"""Bounded thread pool for blocking work started from async views.
+
+Async views hand CPU-bound or blocking calls (upload parsing, text
+extraction, tokenization, local inference) to this pool instead of Django's
+default ``sync_to_async`` executor. Requests beyond ``ASYNC_EXECUTOR_WORKERS``
+wait as coroutines on the event loop rather than each holding a thread.
+Code run here must not use the Django ORM; use the async ORM methods instead.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_EXECUTOR_WORKERS or os.cpu_count() or 1,
+                thread_name_prefix="async-blocking",
+            )
+        return _executor
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` in the bounded executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
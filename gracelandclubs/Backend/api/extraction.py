@@ -0,0 +1,148 @@
+"""Text extraction for uploaded funding forms.
+
+Uploads are read straight from Django's temporary file (or the upload's own
+file object) instead of being copied into memory, every PDF page is extracted
+exactly once, large PDFs are spread over a process pool, and extraction stops
+as soon as the character budget is reached. This module does not depend on
+Django so the FastAPI checker can share it.
+"""
+import codecs
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import docx
+from PyPDF2 import PdfReader
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+PAGES_PER_TASK = 8
+READ_CHUNK_SIZE = 64 * 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # ✅ Spawned, not forked: forking a process that runs other threads can copy their held locks
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def upload_source(upload):
+    """Return a path or seekable file object for an upload without reading it into memory."""
+    if hasattr(upload, "temporary_file_path"):
+        return upload.temporary_file_path()
+    source = getattr(upload, "file", upload)
+    source.seek(0)
+    return source
+
+
+def _extract_page_range(path, start, stop):
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+class _Collector:
+    """Accumulate extracted pieces until the character budget is reached."""
+
+    def __init__(self, char_budget):
+        self.char_budget = char_budget
+        self.parts = []
+        self.size = 0
+
+    @property
+    def full(self):
+        return bool(self.char_budget) and self.size >= self.char_budget
+
+    def add(self, text):
+        if text:
+            self.parts.append(text)
+            self.size += len(text) + 1
+
+    def text(self):
+        text = " ".join(self.parts)
+        return text[:self.char_budget] if self.char_budget else text
+
+
+def extract_pdf(source, char_budget=0, parallel_pages=30, workers=0):
+    reader = PdfReader(source)
+    page_count = len(reader.pages)
+    collector = _Collector(char_budget)
+
+    if not isinstance(source, str) or page_count < parallel_pages:
+        for page in reader.pages:
+            collector.add(page.extract_text())
+            if collector.full:
+                break
+        return collector.text()
+
+    # Keep only a few page ranges in flight so we can stop early on the budget.
+    workers = workers or os.cpu_count()
+    pool = _get_pool(workers)
+    ranges = iter([(start, min(start + PAGES_PER_TASK, page_count))
+                   for start in range(0, page_count, PAGES_PER_TASK)])
+    pending = deque()
+    for _ in range(workers):
+        page_range = next(ranges, None)
+        if page_range is None:
+            break
+        pending.append(pool.submit(_extract_page_range, source, *page_range))
+
+    while pending:
+        for text in pending.popleft().result():
+            collector.add(text)
+        if collector.full:
+            for future in pending:
+                future.cancel()
+            break
+        page_range = next(ranges, None)
+        if page_range is not None:
+            pending.append(pool.submit(_extract_page_range, source, *page_range))
+
+    return collector.text()
+
+
+def extract_docx(source, char_budget=0):
+    collector = _Collector(char_budget)
+    for paragraph in docx.Document(source).paragraphs:
+        collector.add(paragraph.text)
+        if collector.full:
+            break
+    return collector.text()
+
+
+def extract_plain(source, char_budget=0):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    handle = open(source, "rb") if isinstance(source, str) else source
+    parts, size = [], 0
+    try:
+        while not char_budget or size < char_budget:
+            chunk = handle.read(READ_CHUNK_SIZE)
+            if not chunk:
+                parts.append(decoder.decode(b"", final=True))
+                break
+            text = decoder.decode(chunk)
+            parts.append(text)
+            size += len(text)
+    finally:
+        if handle is not source:
+            handle.close()
+    text = "".join(parts)
+    return text[:char_budget] if char_budget else text
+
+
+def extract_text(upload, file_type, char_budget=0, parallel_pages=30, workers=0):
+    """Extract text from an uploaded PDF, DOCX or plain-text file."""
+    source = upload_source(upload)
+    if file_type == PDF:
+        return extract_pdf(source, char_budget, parallel_pages, workers)
+    if file_type == DOCX:
+        return extract_docx(source, char_budget)
+    return extract_plain(source, char_budget)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """Django's PBKDF2-SHA256 hasher with the work factor taken from settings.
+
+    It keeps the ``pbkdf2_sha256`` algorithm name, so existing hashes still
+    verify; after PASSWORD_PBKDF2_ITERATIONS changes, each stored hash is
+    upgraded to the new count the next time its owner logs in.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
@@ -0,0 +1,129 @@
+"""Model loading and text generation for the funding-form analyzer."""
+import json
+from pathlib import Path
+
+import torch
+from django.conf import settings
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+GENERATION_KWARGS = {
+    "max_new_tokens": 500,
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "do_sample": True,
+}
+
+
+INFERENCE_BACKENDS = ("torch", "int8", "onnx")
+
+
+def onnx_export_directory(model_directory) -> Path:
+    """Where the ONNX export of a model is cached."""
+    if settings.MODEL_ONNX_DIRECTORY:
+        return Path(settings.MODEL_ONNX_DIRECTORY)
+    return Path(f"{model_directory}-onnx")
+
+
+def load_model(model_directory, backend="torch"):
+    """Load the seq2seq model for one inference backend.
+
+    ``torch`` is the plain fp32 model, ``int8`` applies dynamic int8
+    quantization to its Linear layers for CPU inference, and ``onnx`` runs an
+    ONNX Runtime export, created on first use and cached on disk.
+    """
+    if backend == "torch":
+        return AutoModelForSeq2SeqLM.from_pretrained(model_directory, device_map='auto')
+
+    if backend == "int8":
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_directory)
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise ImportError("The onnx backend requires optimum[onnxruntime]: pip install 'optimum[onnxruntime]'")
+
+        export_directory = onnx_export_directory(model_directory)
+        if export_directory.is_dir() and any(export_directory.glob("*.onnx")):
+            return ORTModelForSeq2SeqLM.from_pretrained(export_directory)
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_directory, export=True)
+        model.save_pretrained(export_directory)
+        return model
+
+    raise ValueError(f"Unknown inference backend {backend!r}; choose one of {', '.join(INFERENCE_BACKENDS)}")
+
+
+class ModelLoader:
+    """Lazily load the AI model and tokenizer to save memory."""
+    model = None
+    tokenizer = None
+
+    @classmethod
+    def get_tokenizer(cls):
+        """Load only the tokenizer, e.g. for token counting when a model server does generation."""
+        if cls.tokenizer is None:
+            try:
+                cls.tokenizer = AutoTokenizer.from_pretrained(settings.MODEL_DIRECTORY)
+            except Exception as e:
+                raise ImportError(f"Could not load AI tokenizer: {str(e)}")
+        return cls.tokenizer
+
+    @classmethod
+    def get_model(cls):
+        if cls.model is None or cls.tokenizer is None:
+            try:
+                cls.tokenizer = cls.tokenizer or AutoTokenizer.from_pretrained(settings.MODEL_DIRECTORY)
+                cls.model = load_model(settings.MODEL_DIRECTORY, settings.INFERENCE_BACKEND)
+            except Exception as e:
+                raise ImportError(f"Could not load AI model: {str(e)}")
+        return cls.model, cls.tokenizer
+
+
+def model_id() -> str:
+    """Identify the model and backend in use, for keying cached analyses."""
+    return f"{Path(settings.MODEL_DIRECTORY).name}:{settings.INFERENCE_BACKEND}"
+
+
+def generate_batch(prompts, **options):
+    """Run the model on a list of prompts, padded into one batch, in this process.
+
+    ``options`` override ``GENERATION_KWARGS`` for this call.
+    """
+    model, tokenizer = ModelLoader.get_model()
+    return run_generate(model, tokenizer, prompts, **options)
+
+
+def run_generate(model, tokenizer, prompts, **options):
+    """Generate completions for ``prompts`` with an already loaded model."""
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+
+    generation_kwargs = {**GENERATION_KWARGS, **options}
+    if not generation_kwargs["do_sample"]:
+        generation_kwargs.pop("temperature", None)
+        generation_kwargs.pop("top_p", None)
+
+    with torch.no_grad():
+        outputs = model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            **generation_kwargs
+        )
+
+    return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+def generate_text(prompt: str) -> str:
+    """Run the model on a single prompt in this process."""
+    return generate_batch([prompt])[0]
+
+
+def parse_analysis(response: str) -> dict:
+    """Parse the model output into the `issues`/`recommendations` JSON shape."""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        return {
+            "issues": ["Error parsing model response"],
+            "recommendations": ["Please try again."]
+        }
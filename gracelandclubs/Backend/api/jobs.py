@@ -0,0 +1,182 @@
+"""Database-backed job queue for asynchronous form analysis.
+
+Jobs live in the ``AnalysisJob`` table of the project database, so no external
+broker is needed. Workers claim the highest-priority queued job with an
+optimistic ``UPDATE`` and hold a lease that a heartbeat keeps extending while
+the analysis runs. If a worker process dies, its lease expires and another
+worker picks the job up again, up to ``max_attempts`` times.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .analysis import analyze_form_text
+from .models import AnalysisJob
+
+TERMINAL_STATUSES = (AnalysisJob.SUCCEEDED, AnalysisJob.FAILED)
+
+
+def enqueue(text, user, priority=0):
+    """Queue extracted form text for analysis."""
+    return AnalysisJob.objects.create(
+        user=user,
+        text=text,
+        priority=priority,
+        max_attempts=settings.ANALYSIS_JOB_MAX_ATTEMPTS,
+    )
+
+
+async def aenqueue(text, user, priority=0):
+    """``enqueue`` for async views."""
+    return await AnalysisJob.objects.acreate(
+        user=user,
+        text=text,
+        priority=priority,
+        max_attempts=settings.ANALYSIS_JOB_MAX_ATTEMPTS,
+    )
+
+
+def _lease_deadline():
+    return timezone.now() + timedelta(seconds=settings.ANALYSIS_JOB_LEASE_SECONDS)
+
+
+def claim_next(worker_id):
+    """Claim the next runnable job for this worker, or return None."""
+    now = timezone.now()
+    runnable = Q(status=AnalysisJob.QUEUED) | Q(status=AnalysisJob.RUNNING, lease_expires_at__lt=now)
+    candidates = (
+        AnalysisJob.objects.filter(runnable)
+        .order_by("-priority", "created_at")
+        .values_list("id", "status", "attempts", "max_attempts")[:10]
+    )
+
+    for job_id, job_status, attempts, max_attempts in candidates:
+        unchanged = AnalysisJob.objects.filter(id=job_id, status=job_status, attempts=attempts)
+        if attempts >= max_attempts:
+            # ✅ Its last worker crashed on the final attempt
+            unchanged.update(
+                status=AnalysisJob.FAILED,
+                error="Worker stopped before finishing the analysis.",
+                finished_at=now,
+            )
+            continue
+
+        claimed = unchanged.update(
+            status=AnalysisJob.RUNNING,
+            worker=worker_id,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            lease_expires_at=_lease_deadline(),
+        )
+        if claimed:
+            return AnalysisJob.objects.get(id=job_id)
+    return None
+
+
+class _Heartbeat(threading.Thread):
+    """Keep extending a running job's lease until stopped."""
+
+    def __init__(self, job):
+        super().__init__(name=f"analysis-job-{job.id}-heartbeat", daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        interval = settings.ANALYSIS_JOB_LEASE_SECONDS / 3
+        while not self.stopped.wait(interval):
+            AnalysisJob.objects.filter(id=self.job.id, worker=self.job.worker, attempts=self.job.attempts).update(
+                lease_expires_at=_lease_deadline()
+            )
+        close_old_connections()
+
+
+def run_job(job):
+    """Analyze a claimed job and record its result, or requeue it on failure."""
+    owned = AnalysisJob.objects.filter(id=job.id, worker=job.worker, attempts=job.attempts)
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        analysis = analyze_form_text(job.text)
+    except Exception as e:
+        retry = job.attempts < job.max_attempts
+        owned.update(
+            status=AnalysisJob.QUEUED if retry else AnalysisJob.FAILED,
+            error=str(e),
+            lease_expires_at=None,
+            finished_at=None if retry else timezone.now(),
+        )
+    else:
+        owned.update(
+            status=AnalysisJob.SUCCEEDED,
+            result=analysis,
+            error="",
+            lease_expires_at=None,
+            finished_at=timezone.now(),
+        )
+    finally:
+        heartbeat.stopped.set()
+
+
+class WorkerPool:
+    """A fixed number of threads that claim and run analysis jobs."""
+
+    def __init__(self, concurrency=None, poll_interval=None):
+        self.concurrency = concurrency or settings.ANALYSIS_JOB_CONCURRENCY
+        self.poll_interval = poll_interval or settings.ANALYSIS_JOB_POLL_SECONDS
+        self.stopped = threading.Event()
+        self.threads = []
+
+    def _worker_loop(self, worker_id):
+        while not self.stopped.is_set():
+            close_old_connections()
+            job = claim_next(worker_id)
+            if job is None:
+                self.stopped.wait(self.poll_interval)
+                continue
+            run_job(job)
+        close_old_connections()
+
+    def start(self):
+        host = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._worker_loop, args=(f"{host}:{index}",),
+                name=f"analysis-worker-{index}", daemon=True,
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+
+def wait_for_change(job, timeout):
+    """Poll a job until its status or attempt count changes, or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(settings.ANALYSIS_JOB_POLL_SECONDS)
+        current = AnalysisJob.objects.get(id=job.id)
+        if (current.status, current.attempts) != (job.status, job.attempts):
+            return current
+    return job
+
+
+async def await_change(job, timeout):
+    """``wait_for_change`` for async views: sleeps on the event loop instead of holding a thread."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.ANALYSIS_JOB_POLL_SECONDS)
+        current = await AnalysisJob.objects.aget(id=job.id)
+        if (current.status, current.attempts) != (job.status, job.attempts):
+            return current
+    return job
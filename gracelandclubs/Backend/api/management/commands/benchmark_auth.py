@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from api.authentication import CachedJWTAuthentication, user_cache
+from api.models import User
+
+
+class _ReadOnlyView:
+    stateless_reads = True
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure per-request JWT authentication cost of simplejwt vs. the cached and stateless paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="Authentications per backend")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                # ✅ Throwaway user, rolled back afterwards
+                user = User.objects.create(username="__auth_benchmark__", email="auth-benchmark@example.invalid")
+                self.run(user, options["requests"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, user, count):
+        factory = APIRequestFactory()
+        header = f"Bearer {AccessToken.for_user(user)}"
+        user_cache.clear()
+
+        cases = [
+            ("simplejwt JWTAuthentication", JWTAuthentication, None),
+            ("cached user (writes, non-opted views)", CachedJWTAuthentication, None),
+            ("token claims (opted-in GET views)", CachedJWTAuthentication, _ReadOnlyView()),
+        ]
+        for label, backend, view in cases:
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(count):
+                    request = Request(factory.get("/", HTTP_AUTHORIZATION=header), parser_context={"view": view})
+                    started = time.perf_counter()
+                    backend().authenticate(request)
+                    timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f"{label:<40} median {1e6 * statistics.median(timings):7.1f} µs | "
+                f"p99 {1e6 * timings[int(0.99 * (len(timings) - 1))]:7.1f} µs | "
+                f"{len(queries) / count:.3f} queries/request"
+            )
@@ -0,0 +1,94 @@
+import gc
+import statistics
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import psutil
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from transformers import AutoTokenizer
+from api.inference import INFERENCE_BACKENDS, load_model, run_generate
+from api.prompts import generate_prompt
+
+SAMPLE_FORMS = [
+    """Club: Chess Club
+Amount requested: $250 (one-time)
+Purpose: Buy six tournament chess sets for the spring open tournament on April 12.
+Other funding: $100 from club dues.
+Advertising: Posters in the student union and a post on the campus events page.""",
+    """Club: Outdoor Adventure
+Amount requested: $600, recurring each semester
+Purpose: Gas money for the van to the climbing gym.
+Other funding:
+Expected attendance: 8 members""",
+    """Club: International Student Association
+Amount requested: $1,200 (one-time)
+Purpose: Food and decorations for the Global Night festival, open to all students, about 300 expected.
+Date of spending: March 3
+Other funding: Student Life co-sponsorship of $400, ticket sales.
+Advertising: Chapel announcements, table tents in the cafeteria and social media.""",
+]
+
+
+class Command(BaseCommand):
+    help = "Compare latency, memory and output agreement of the form-analyzer inference backends"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS), choices=INFERENCE_BACKENDS)
+        parser.add_argument("--runs", type=int, default=3, help="Timed runs per sample form")
+        parser.add_argument("--samples", help="Directory of .txt sample forms to use instead of the built-in ones")
+        parser.add_argument("--max-new-tokens", type=int, default=100)
+
+    def handle(self, *args, **options):
+        forms = SAMPLE_FORMS
+        if options["samples"]:
+            forms = [path.read_text() for path in sorted(Path(options["samples"]).glob("*.txt"))]
+            if not forms:
+                raise CommandError(f"No .txt sample forms found in {options['samples']}")
+        prompts = [generate_prompt(form) for form in forms]
+
+        tokenizer = AutoTokenizer.from_pretrained(settings.MODEL_DIRECTORY)
+        # ✅ Greedy decoding so outputs are comparable across backends
+        generation = {"do_sample": False, "max_new_tokens": options["max_new_tokens"]}
+        process = psutil.Process()
+        baseline = None
+
+        for backend in options["backends"]:
+            gc.collect()
+            rss_before = process.memory_info().rss
+            started = time.perf_counter()
+            try:
+                model = load_model(settings.MODEL_DIRECTORY, backend)
+            except ImportError as e:
+                self.stderr.write(self.style.WARNING(f"{backend}: skipped ({e})"))
+                continue
+            load_seconds = time.perf_counter() - started
+
+            run_generate(model, tokenizer, prompts[:1], **generation)  # ✅ Warm-up
+            latencies, outputs = [], []
+            for prompt in prompts:
+                timings = []
+                for _ in range(options["runs"]):
+                    started = time.perf_counter()
+                    output = run_generate(model, tokenizer, [prompt], **generation)[0]
+                    timings.append(time.perf_counter() - started)
+                latencies.append(statistics.median(timings))
+                outputs.append(output)
+            rss_mb = (process.memory_info().rss - rss_before) / 2**20
+
+            if baseline is None:
+                baseline = (backend, outputs)
+            exact = sum(a == b for a, b in zip(outputs, baseline[1])) / len(outputs)
+            similarity = statistics.mean(SequenceMatcher(None, a, b).ratio() for a, b in zip(outputs, baseline[1]))
+
+            self.stdout.write(
+                f"{backend:>6}: load {load_seconds:6.2f}s | "
+                f"median latency {1000 * statistics.median(latencies):8.1f} ms | "
+                f"max {1000 * max(latencies):8.1f} ms | "
+                f"RSS +{rss_mb:7.1f} MB | "
+                f"agreement with {baseline[0]}: {exact:.0%} exact, {similarity:.0%} similar"
+            )
+
+            del model
+            gc.collect()
@@ -0,0 +1,120 @@
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from api.db_tuning import tune
+
+SCHEMA = (
+    "CREATE TABLE event (id INTEGER PRIMARY KEY, club_id INTEGER NOT NULL, name TEXT NOT NULL, date REAL NOT NULL)",
+    "CREATE INDEX event_club_date ON event (club_id, date)",
+)
+
+# (label, tuned PRAGMAs, BEGIN statement, one connection per thread)
+MODES = [
+    ("Django defaults (rollback journal, per-request connections)", False, "BEGIN", False),
+    ("tuned PRAGMAs + BEGIN IMMEDIATE", True, "BEGIN IMMEDIATE", False),
+    ("tuned + persistent connections (CONN_MAX_AGE)", True, "BEGIN IMMEDIATE", True),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare SQLite throughput with concurrent readers and writers, before and after connection tuning"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+
+    def handle(self, *args, **options):
+        # ✅ A scratch database, so the benchmark never touches db.sqlite3
+        with tempfile.TemporaryDirectory() as directory:
+            for index, (label, tuned, begin, persistent) in enumerate(MODES):
+                path = Path(directory) / f"bench-{index}.sqlite3"
+                self.create(path)
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.run(path, tuned, begin, persistent, options)
+
+    def create(self, path):
+        conn = sqlite3.connect(path)
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.executemany(
+            "INSERT INTO event (club_id, name, date) VALUES (?, ?, ?)",
+            ((i % 50, f"seed {i}", i) for i in range(20000)),
+        )
+        conn.commit()
+        conn.close()
+
+    def run(self, path, tuned, begin, persistent, options):
+        stop = time.monotonic() + options["seconds"]
+        results = {"write": [], "read": []}
+        errors = {"write": 0, "read": 0}
+        lock = threading.Lock()
+
+        def connect():
+            # ✅ isolation_level=None: transactions are started explicitly, like Django's autocommit mode
+            conn = sqlite3.connect(path, isolation_level=None)
+            return tune(conn) if tuned else conn
+
+        def write(conn, n):
+            # ✅ Read then write in one transaction, like a create view that validates first
+            conn.execute(begin)
+            try:
+                conn.execute("SELECT COUNT(*) FROM event WHERE club_id = ?", (n % 50,)).fetchone()
+                conn.execute("INSERT INTO event (club_id, name, date) VALUES (?, ?, ?)", (n % 50, f"event {n}", time.time()))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+        def read(conn, n):
+            conn.execute(
+                "SELECT id, name, date FROM event WHERE club_id = ? ORDER BY date DESC LIMIT 50", (n % 50,)
+            ).fetchall()
+
+        def worker(kind, operation):
+            conn = connect() if persistent else None
+            timings, failed, n = [], 0, 0
+            while time.monotonic() < stop:
+                n += 1
+                started = time.perf_counter()
+                request_conn = conn or connect()
+                try:
+                    operation(request_conn, n)
+                    timings.append(time.perf_counter() - started)
+                except sqlite3.OperationalError:
+                    failed += 1
+                finally:
+                    if conn is None:
+                        request_conn.close()
+            if conn is not None:
+                conn.close()
+            with lock:
+                results[kind] += timings
+                errors[kind] += failed
+
+        threads = [threading.Thread(target=worker, args=("write", write)) for _ in range(options["writers"])]
+        threads += [threading.Thread(target=worker, args=("read", read)) for _ in range(options["readers"])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.monotonic() - started
+
+        for kind in ("write", "read"):
+            timings = sorted(results[kind])
+            if not timings:
+                self.stdout.write(f"  {kind:>5}s: none completed | {errors[kind]} 'database is locked' errors")
+                continue
+            self.stdout.write(
+                f"  {kind:>5}s: {len(timings) / wall:8.0f} ops/s | "
+                f"p50 {1000 * statistics.median(timings):7.2f} ms | "
+                f"p99 {1000 * timings[int(0.99 * (len(timings) - 1))]:7.2f} ms | "
+                f"{errors[kind]} 'database is locked' errors"
+            )
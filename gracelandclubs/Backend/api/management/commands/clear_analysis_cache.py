@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.analysis_cache import AnalysisCache
+from api.prompts import REQUIREMENTS_VERSION
+
+class Command(BaseCommand):
+    help = "Invalidate cached funding-form analyses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale", action="store_true",
+            help="Only drop expired entries and entries made with an older FUNDING_REQUIREMENTS prompt",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.ANALYSIS_CACHE_PATH:
+            raise CommandError("The analysis cache is disabled (ANALYSIS_CACHE_PATH is empty).")
+
+        cache = AnalysisCache(settings.ANALYSIS_CACHE_PATH, ttl=settings.ANALYSIS_CACHE_TTL)
+        removed = cache.purge_stale(REQUIREMENTS_VERSION) if options["stale"] else cache.clear()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached analyses."))
@@ -1,33 +1,128 @@
+import time
+from pathlib import Path
+
 import pandas as pd
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from api.models import NutritionData
 
+# Spreadsheet header -> model field
+COLUMNS = {
+    "Food Name": "food_name",
+    "Calories": "calories",
+    "Fat": "fat",
+    "Protein": "protein",
+    "Carbohydrates": "carbohydrates",
+    "Sodium": "sodium",
+    "Sugar": "sugar",
+    "Fiber": "fiber",
+    "Iron": "iron",
+    "Calcium": "calcium",
+    "Vitamin A": "vitamin_a",
+    "Vitamin C": "vitamin_c",
+}
+NUMERIC_FIELDS = [field for field in COLUMNS.values() if field != "food_name"]
+
+
+def _excel_chunks(path, chunk_size, sheet=None):
+    """Stream an .xlsx sheet in DataFrame chunks (pandas can only read a whole sheet at once)."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = (workbook[sheet] if sheet else workbook.active).iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, [])]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def _parquet_chunks(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise CommandError("Reading Parquet files needs pyarrow (pip install pyarrow).")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def read_chunks(path, chunk_size, sheet=None):
+    suffix = Path(path).suffix.lower()
+    if suffix in (".csv", ".txt"):
+        return pd.read_csv(path, chunksize=chunk_size)
+    if suffix in (".xlsx", ".xlsm"):
+        return _excel_chunks(path, chunk_size, sheet)
+    if suffix == ".parquet":
+        return _parquet_chunks(path, chunk_size)
+    raise CommandError(f"Unsupported file type '{suffix}'. Use .csv, .xlsx or .parquet.")
+
+
+def clean_chunk(df):
+    """Map headers to fields and convert whole columns at once."""
+    headers = {header.lower(): field for header, field in COLUMNS.items()}
+    df = df.rename(columns=lambda column: headers.get(str(column).strip().lower(), column))
+    if "food_name" not in df.columns:
+        raise CommandError("The file has no 'Food Name' column.")
+
+    df = df.reindex(columns=list(COLUMNS.values()))
+    df["food_name"] = df["food_name"].astype("string").str.strip()
+    df = df[df["food_name"].notna() & (df["food_name"] != "")].copy()
+    df[NUMERIC_FIELDS] = df[NUMERIC_FIELDS].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    # ✅ One row per food; the last one in the file wins, as in upsert mode
+    return df.drop_duplicates("food_name", keep="last")
+
+
 class Command(BaseCommand):
-    help = "Load nutrition data from an Excel file into the database"
-
-    def handle(self, *args, **kwargs):
-        file_path = "/mnt/data/sssss.xlsx"
-
-        try:
-            df = pd.read_excel(file_path)
-
-            for _, row in df.iterrows():
-                NutritionData.objects.create(
-                    food_name=row.get("Food Name", ""),
-                    calories=row.get("Calories", 0),
-                    fat=row.get("Fat", 0),
-                    protein=row.get("Protein", 0),
-                    carbohydrates=row.get("Carbohydrates", 0),
-                    sodium=row.get("Sodium", 0),
-                    sugar=row.get("Sugar", 0),
-                    fiber=row.get("Fiber", 0),
-                    iron=row.get("Iron", 0),
-                    calcium=row.get("Calcium", 0),
-                    vitamin_a=row.get("Vitamin A", 0),
-                    vitamin_c=row.get("Vitamin C", 0),
-                )
-
-            self.stdout.write(self.style.SUCCESS("Successfully loaded nutrition data!"))
-
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Error loading data: {str(e)}"))
+    help = "Load nutrition data from a CSV, Excel or Parquet file into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV, .xlsx or .parquet file with a 'Food Name' column")
+        parser.add_argument("--sheet", help="Excel sheet to read (default: the first)")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Rows read and committed per transaction")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT statement")
+        parser.add_argument(
+            "--upsert", action="store_true",
+            help="Update foods that already exist (matched on food name) instead of skipping them",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not Path(path).is_file():
+            raise CommandError(f"File not found: {path}")
+
+        write_options = {"batch_size": options["batch_size"]}
+        if options["upsert"]:
+            write_options.update(update_conflicts=True, unique_fields=["food_name"], update_fields=NUMERIC_FIELDS)
+        else:
+            write_options["ignore_conflicts"] = True
+
+        started = time.perf_counter()
+        total = inserted = 0
+        for chunk in read_chunks(path, options["chunk_size"], options["sheet"]):
+            df = clean_chunk(chunk)
+            records = [NutritionData(**record) for record in df.to_dict("records")]
+            with transaction.atomic():
+                # ✅ bulk_create can't tell inserted rows from skipped or updated ones, so look up this chunk's foods first
+                existing = NutritionData.objects.filter(food_name__in=df["food_name"].tolist()).count()
+                NutritionData.objects.bulk_create(records, **write_options)
+                inserted += len(records) - existing
+
+            total += len(records)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{total:>9,} rows | {inserted:>9,} inserted | {elapsed:7.1f}s | {total / elapsed:9,.0f} rows/s"
+            )
+
+        elapsed = time.perf_counter() - started
+        existing = "updated" if options["upsert"] else "skipped (already loaded)"
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {total:,} nutrition rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s): "
+            f"{inserted:,} inserted, {total - inserted:,} {existing}."
+        ))
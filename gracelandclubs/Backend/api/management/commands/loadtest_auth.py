@@ -0,0 +1,96 @@
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from api.models import User
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class Command(BaseCommand):
+    help = "Load-test /api/register/ and /api/login/ with concurrent users and a chosen PBKDF2 work factor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100, help="Accounts to register, then log in")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--iterations", type=int,
+            help="PBKDF2 iterations for this run (in-process only; default: PASSWORD_PBKDF2_ITERATIONS)",
+        )
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000/api (default: in-process)")
+        parser.add_argument("--keep", action="store_true", help="Keep the load-test accounts afterwards")
+
+    def handle(self, *args, **options):
+        if options["url"] and options["iterations"]:
+            raise CommandError("--iterations only applies in-process; set PASSWORD_PBKDF2_ITERATIONS on the server instead.")
+
+        # ✅ In-process requests still pass ALLOWED_HOSTS checks
+        self.host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+        prefix = f"loadtest-{uuid.uuid4().hex[:8]}"
+        accounts = [(f"{prefix}-{i}", f"{prefix}-{i}@example.invalid", f"Lt-{uuid.uuid4().hex}") for i in range(options["users"])]
+        post = self.remote_post(options["url"]) if options["url"] else self.local_post
+
+        overrides = {"PASSWORD_PBKDF2_ITERATIONS": options["iterations"]} if options["iterations"] else {}
+        try:
+            with override_settings(**overrides):
+                self.phase("register", post, options["concurrency"], [
+                    ("/register/", {"username": u, "email": e, "password": p, "password2": p}, 201)
+                    for u, e, p in accounts
+                ])
+                self.phase("login", post, options["concurrency"], [
+                    ("/login/", {"username": u, "password": p}, 200) for u, _, p in accounts
+                ])
+        finally:
+            if not options["keep"] and not options["url"]:
+                User.objects.filter(username__startswith=prefix).delete()
+
+    def local_post(self, path, payload):
+        try:
+            return Client(HTTP_HOST=self.host).post(f"/api{path}", payload, content_type="application/json").status_code
+        finally:
+            close_old_connections()
+
+    def remote_post(self, base_url):
+        def post(path, payload):
+            request = urlrequest.Request(
+                base_url.rstrip("/") + path, data=json.dumps(payload).encode(),
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            try:
+                with urlrequest.urlopen(request) as response:
+                    return response.status
+            except HTTPError as e:
+                return e.code
+        return post
+
+    def phase(self, name, post, concurrency, calls):
+        def timed(call):
+            path, payload, expected = call
+            started = time.perf_counter()
+            status = post(path, payload)
+            return time.perf_counter() - started, status == expected
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, calls))
+        wall = time.perf_counter() - started
+
+        latencies = [latency for latency, _ in results]
+        failures = sum(not ok for _, ok in results)
+        self.stdout.write(
+            f"{name:>8}: {len(results) / wall:7.1f} req/s | "
+            f"p50 {1000 * statistics.median(latencies):7.1f} ms | "
+            f"p99 {1000 * _percentile(latencies, 0.99):7.1f} ms | "
+            f"{failures} failed"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand, CommandError
+from api import search
+
+class Command(BaseCommand):
+    help = "Re-index every user for /api/search-users/ (needed after bulk updates that skip signals)"
+
+    def handle(self, *args, **options):
+        if not search.index_available():
+            raise CommandError("The user search index does not exist; run migrate on an SQLite database.")
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} users."))
@@ -0,0 +1,24 @@
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.jobs import WorkerPool
+
+class Command(BaseCommand):
+    help = "Run the local worker pool that processes queued form analyses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.ANALYSIS_JOB_CONCURRENCY, help="Number of jobs to run at once")
+
+    def handle(self, *args, **options):
+        pool = WorkerPool(concurrency=options["concurrency"])
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(f"Running {pool.concurrency} analysis workers. Press Ctrl+C to stop."))
+
+        signal.signal(signal.SIGTERM, lambda *_: pool.stopped.set())
+        try:
+            while not pool.stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.stop(timeout=5)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.model_server import ModelServer, ModelServerClient, ModelServerError
+
+class Command(BaseCommand):
+    help = "Run the shared form-analysis model server on a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=settings.MODEL_SERVER_SOCKET, help="Path of the Unix socket to listen on")
+        parser.add_argument("--check", action="store_true", help="Probe a running server's readiness and exit")
+
+    def handle(self, *args, **options):
+        socket_path = options["socket"]
+        if not socket_path:
+            raise CommandError("No socket path given. Set MODEL_SERVER_SOCKET or pass --socket.")
+
+        if options["check"]:
+            try:
+                health = ModelServerClient(socket_path, timeout=5).health()
+            except ModelServerError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"Model server ready: {health}"))
+            return
+
+        self.stdout.write(f"Loading model from {settings.MODEL_DIRECTORY}...")
+        try:
+            server = ModelServer(socket_path)
+        except ImportError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"Model server listening on {socket_path}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_memberships(apps, schema_editor):
+    """Copy both old membership tables (User.clubs and Clubs.members) into Membership."""
+    User = apps.get_model('api', 'User')
+    Clubs = apps.get_model('api', 'Clubs')
+    Membership = apps.get_model('api', 'Membership')
+
+    pairs = set(User.clubs.through.objects.values_list('user_id', 'clubs_id'))
+    pairs |= set(Clubs.members.through.objects.values_list('user_id', 'clubs_id'))
+    owners = set(Clubs.objects.values_list('owner_id', 'id'))
+
+    Membership.objects.bulk_create(
+        [
+            Membership(user_id=user_id, club_id=club_id, role='owner' if (user_id, club_id) in owners else 'member')
+            for user_id, club_id in pairs
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def split_memberships(apps, schema_editor):
+    """Reverse: write every Membership back into both old tables."""
+    User = apps.get_model('api', 'User')
+    Clubs = apps.get_model('api', 'Clubs')
+    Membership = apps.get_model('api', 'Membership')
+
+    pairs = list(Membership.objects.values_list('user_id', 'club_id'))
+    User.clubs.through.objects.bulk_create(
+        [User.clubs.through(user_id=user_id, clubs_id=club_id) for user_id, club_id in pairs],
+        batch_size=500, ignore_conflicts=True,
+    )
+    Clubs.members.through.objects.bulk_create(
+        [Clubs.members.through(user_id=user_id, clubs_id=club_id) for user_id, club_id in pairs],
+        batch_size=500, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Membership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('member', 'Member'), ('officer', 'Officer'), ('owner', 'Owner')], default='member', max_length=16)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('club', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='api.clubs')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('club', 'user'), name='unique_club_membership')],
+            },
+        ),
+        migrations.RunPython(merge_memberships, split_memberships),
+        migrations.RemoveField(
+            model_name='user',
+            name='clubs',
+        ),
+        migrations.RemoveField(
+            model_name='clubs',
+            name='members',
+        ),
+        migrations.AddField(
+            model_name='clubs',
+            name='members',
+            field=models.ManyToManyField(blank=True, related_name='clubs', through='api.Membership', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+COLUMNS = "username, email, first_name, last_name"
+
+
+def create_search_index(apps, schema_editor):
+    """Create and fill the FTS5 user search table (SQLite only; other databases fall back to icontains)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS api_user_search USING fts5("
+        f"{COLUMNS}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO api_user_search (rowid, {COLUMNS}) SELECT id, {COLUMNS} FROM api_user"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS api_user_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_membership'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
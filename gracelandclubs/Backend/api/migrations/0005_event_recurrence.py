@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_event_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('weekly', 'Weekly'), ('monthly', 'Monthly')], default='weekly', max_length=16)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('weekdays', models.CharField(blank=True, default='', max_length=20)),
+                ('until', models.DateTimeField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence', to='api.event')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_date', models.DateTimeField()),
+                ('cancelled', models.BooleanField(default=False)),
+                ('date', models.DateTimeField(blank=True, null=True)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('description', models.TextField(blank=True, default='')),
+                ('recurrence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='api.eventrecurrence')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('recurrence', 'original_date'), name='unique_event_exception')],
+            },
+        ),
+    ]
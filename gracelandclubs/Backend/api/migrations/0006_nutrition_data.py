@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NutritionData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_name', models.CharField(max_length=255, unique=True)),
+                ('calories', models.FloatField(default=0)),
+                ('fat', models.FloatField(default=0)),
+                ('protein', models.FloatField(default=0)),
+                ('carbohydrates', models.FloatField(default=0)),
+                ('sodium', models.FloatField(default=0)),
+                ('sugar', models.FloatField(default=0)),
+                ('fiber', models.FloatField(default=0)),
+                ('iron', models.FloatField(default=0)),
+                ('calcium', models.FloatField(default=0)),
+                ('vitamin_a', models.FloatField(default=0)),
+                ('vitamin_c', models.FloatField(default=0)),
+            ],
+        ),
+    ]
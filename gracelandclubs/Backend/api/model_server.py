@@ -0,0 +1,172 @@
+"""Local inference server that keeps one warm copy of the model for every worker.
+
+Django workers talk to it over a Unix socket with length-prefixed JSON messages:
+``{"op": "generate", "prompt": ...}`` returns ``{"text": ...}``,
+``{"op": "generate_batch", "prompts": [...], "options": {...}}`` returns
+``{"texts": [...]}`` and ``{"op": "health"}`` returns the readiness status and batching metrics.
+Only the generation options in ``ALLOWED_OPTIONS`` are passed on to the model.
+"""
+import json
+import os
+import socket
+import socketserver
+import struct
+import time
+
+from django.conf import settings
+
+from .batching import get_scheduler
+from .inference import ModelLoader
+
+_HEADER = struct.Struct("!I")
+
+# Generation options a client may set, with their accepted types.
+ALLOWED_OPTIONS = {
+    "max_new_tokens": int,
+    "min_new_tokens": int,
+    "num_beams": int,
+    "do_sample": bool,
+    "temperature": (int, float),
+    "top_p": (int, float),
+    "top_k": int,
+    "repetition_penalty": (int, float),
+    "length_penalty": (int, float),
+    "no_repeat_ngram_size": int,
+    "early_stopping": bool,
+}
+
+
+class ModelServerError(Exception):
+    """Raised when the model server cannot be reached or reports a failure."""
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def send_message(sock, payload):
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+def check_options(options):
+    """Return client-supplied generation options, or raise ValueError for any not in ALLOWED_OPTIONS."""
+    if not isinstance(options, dict):
+        raise ValueError("Options must be an object")
+    unknown = sorted(set(options) - set(ALLOWED_OPTIONS))
+    if unknown:
+        raise ValueError(f"Unsupported generation options: {', '.join(unknown)}")
+    for name, value in options.items():
+        expected = ALLOWED_OPTIONS[name]
+        # ✅ bool is an int subclass, so True is not accepted as a token count
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            raise ValueError(f"Invalid value for generation option '{name}'")
+    return options
+
+
+def check_prompts(prompts):
+    if not isinstance(prompts, list) or not all(isinstance(prompt, str) for prompt in prompts):
+        raise ValueError("Prompts must be a list of strings")
+    return prompts
+
+
+class ModelRequestHandler(socketserver.BaseRequestHandler):
+    """Serve one request per connection."""
+
+    def handle(self):
+        try:
+            request = recv_message(self.request)
+        except (ConnectionError, ValueError):
+            return
+
+        op = request.get("op") if isinstance(request, dict) else None
+        try:
+            if op == "health":
+                response = self.server.health()
+            elif op == "generate":
+                response = {"text": self.server.generate(request["prompt"])}
+            elif op == "generate_batch":
+                options = check_options(request.get("options", {}))
+                response = {"texts": self.server.generate_batch(check_prompts(request["prompts"]), options)}
+            else:
+                response = {"error": f"Unknown operation: {op}"}
+        except Exception as e:
+            response = {"error": str(e)}
+
+        send_message(self.request, response)
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server that loads the model before it starts accepting requests."""
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        self.socket_path = str(socket_path)
+        ModelLoader.get_model()  # ✅ Preload so the socket only appears once we are ready
+        self.started_at = time.monotonic()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        super().__init__(self.socket_path, ModelRequestHandler)
+        os.chmod(self.socket_path, 0o660)
+
+    def generate(self, prompt):
+        return get_scheduler().submit(prompt)
+
+    def generate_batch(self, prompts, options):
+        return get_scheduler().submit_many(prompts, options=options)
+
+    def health(self):
+        return {
+            "status": "ready",
+            "model_directory": str(settings.MODEL_DIRECTORY),
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "batching": get_scheduler().stats(),
+        }
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class ModelServerClient:
+    """Client used by Django workers to call the shared model server."""
+
+    def __init__(self, socket_path=None, timeout=None):
+        self.socket_path = str(socket_path or settings.MODEL_SERVER_SOCKET)
+        self.timeout = timeout if timeout is not None else settings.MODEL_SERVER_TIMEOUT
+
+    def _call(self, payload):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                send_message(sock, payload)
+                response = recv_message(sock)
+        except (OSError, ConnectionError, ValueError) as e:
+            raise ModelServerError(f"Model server unavailable at {self.socket_path}: {e}")
+
+        if "error" in response:
+            raise ModelServerError(response["error"])
+        return response
+
+    def generate(self, prompt):
+        return self._call({"op": "generate", "prompt": prompt})["text"]
+
+    def generate_batch(self, prompts, **options):
+        return self._call({"op": "generate_batch", "prompts": prompts, "options": options})["texts"]
+
+    def health(self):
+        return self._call({"op": "health"})
@@ -3,13 +3,8 @@ from django.contrib.auth.models import AbstractUser
 
 class User(AbstractUser):
     email = models.EmailField(unique=True, blank=False, null=False)  # ✅ Make email required
-    
-    # ✅ Define a ManyToManyField for clubs the user is a member of
-    clubs = models.ManyToManyField(
-        'Clubs', 
-        related_name="club_members",  # ✅ Avoids conflict with `Clubs.members`
-        blank=True
-    )
+
+    # ✅ `user.clubs` is the reverse side of `Clubs.members` (one Membership table)
 
     def __str__(self):
         return self.username
@@ -25,10 +20,11 @@ class Clubs(models.Model):
     description = models.TextField(default="Enter Description Here:")
     image_url = models.TextField(default="")  # ✅ Consistent naming and avoids "na"
 
-    # ✅ Many-to-many relationship with users who are members
+    # ✅ Single membership relation for both `club.members` and `user.clubs`
     members = models.ManyToManyField(
-        User, 
-        related_name="club_list",  # ✅ Avoids conflict with `User.clubs`
+        User,
+        through="Membership",
+        related_name="clubs",
         blank=True
     )
 
@@ -36,6 +32,31 @@ class Clubs(models.Model):
         return self.name
 
 
+class Membership(models.Model):
+    MEMBER = "member"
+    OFFICER = "officer"
+    OWNER = "owner"
+    ROLE_CHOICES = [
+        (MEMBER, "Member"),
+        (OFFICER, "Officer"),
+        (OWNER, "Owner"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="memberships")
+    club = models.ForeignKey(Clubs, on_delete=models.CASCADE, related_name="memberships")
+    role = models.CharField(max_length=16, choices=ROLE_CHOICES, default=MEMBER)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # ✅ Composite unique index: a membership check is one indexed lookup
+        constraints = [
+            models.UniqueConstraint(fields=["club", "user"], name="unique_club_membership"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.club} ({self.role})"
+
+
 class Event(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -43,5 +64,102 @@ class Event(models.Model):
     image_url = models.URLField(blank=True, null=True)
     club = models.ForeignKey(Clubs, on_delete=models.CASCADE, related_name="events")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["club", "date"], name="event_club_date_idx"),  # ✅ Club calendar ranges
+            models.Index(fields=["date"], name="event_date_idx"),  # ✅ All-clubs calendar ranges
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.club.name}"
+
+
+class EventRecurrence(models.Model):
+    """RRULE-style repetition of an event; `event.date` is the first occurrence."""
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    FREQUENCY_CHOICES = [
+        (WEEKLY, "Weekly"),
+        (MONTHLY, "Monthly"),
+    ]
+
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name="recurrence")
+    frequency = models.CharField(max_length=16, choices=FREQUENCY_CHOICES, default=WEEKLY)
+    interval = models.PositiveSmallIntegerField(default=1)  # ✅ Every `interval` weeks/months
+    weekdays = models.CharField(max_length=20, blank=True, default="")  # ✅ e.g. "MO,WE"; empty means the start's weekday
+    until = models.DateTimeField(null=True, blank=True)  # ✅ Inclusive end of the series
+    count = models.PositiveIntegerField(null=True, blank=True)  # ✅ Or a fixed number of occurrences
+
+    def __str__(self):
+        return f"{self.event.name} ({self.frequency})"
+
+
+class EventException(models.Model):
+    """One changed or cancelled occurrence of a recurring event; unchanged occurrences store nothing."""
+    recurrence = models.ForeignKey(EventRecurrence, on_delete=models.CASCADE, related_name="exceptions")
+    original_date = models.DateTimeField()  # ✅ The occurrence being changed
+    cancelled = models.BooleanField(default=False)
+    date = models.DateTimeField(null=True, blank=True)  # ✅ Moved to, if set
+    name = models.CharField(max_length=255, blank=True, default="")
+    description = models.TextField(blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["recurrence", "original_date"], name="unique_event_exception"),
+        ]
+
+    def __str__(self):
+        return f"{self.recurrence} on {self.original_date}"
+
+
+class NutritionData(models.Model):
+    """Nutrition facts per food, loaded with `manage.py load_nutrion_data`."""
+    food_name = models.CharField(max_length=255, unique=True)  # ✅ Upsert key for reloads
+    calories = models.FloatField(default=0)
+    fat = models.FloatField(default=0)
+    protein = models.FloatField(default=0)
+    carbohydrates = models.FloatField(default=0)
+    sodium = models.FloatField(default=0)
+    sugar = models.FloatField(default=0)
+    fiber = models.FloatField(default=0)
+    iron = models.FloatField(default=0)
+    calcium = models.FloatField(default=0)
+    vitamin_a = models.FloatField(default=0)
+    vitamin_c = models.FloatField(default=0)
+
+    def __str__(self):
+        return self.food_name
+
+
+class AnalysisJob(models.Model):
+    """A queued form analysis, run by `manage.py run_analysis_workers`."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="analysis_jobs")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.IntegerField(default=0)  # ✅ Higher runs first
+    text = models.TextField()  # ✅ Extracted form text, so workers never need the upload
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    worker = models.CharField(max_length=255, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)  # ✅ Expired leases mean the worker crashed
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "-priority", "created_at"])]
+
+    def __str__(self):
+        return f"Analysis job {self.id} ({self.status})"
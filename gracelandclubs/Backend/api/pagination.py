@@ -0,0 +1,73 @@
+"""Keyset (cursor) pagination for event lists.
+
+Events are ordered by ``(date, id)`` with undated events first, and a cursor
+records the last row served, so each page is an index range scan instead of
+an ``OFFSET`` that re-reads every earlier row. Response bodies stay plain
+lists for the calendar; the next cursor goes in the ``X-Next-Cursor`` header.
+"""
+import base64
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+EVENT_ORDERING = (F("date").asc(nulls_first=True), "id")
+
+
+class CursorError(ValueError):
+    """Raised for a cursor that cannot be decoded."""
+
+
+def encode_cursor(date, pk):
+    payload = json.dumps({"d": date.isoformat() if date else None, "i": pk}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        date = parse_datetime(payload["d"]) if payload["d"] else None
+        if payload["d"] and date is None:
+            raise ValueError(payload["d"])
+        return date, int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("Invalid cursor.")
+
+
+def rows_after(date, pk):
+    """Rows that sort after ``(date, pk)`` in ``EVENT_ORDERING``."""
+    if date is None:
+        return Q(date__isnull=True, id__gt=pk) | Q(date__isnull=False)
+    return Q(date__gt=date) | Q(date=date, id__gt=pk)
+
+
+def _page_rows(rows, limit, cursor):
+    rows = rows.order_by(*EVENT_ORDERING)
+    if cursor:
+        rows = rows.filter(rows_after(*decode_cursor(cursor)))
+    return rows[:limit + 1]
+
+
+def _split_page(page, limit):
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(page[-1]["date"], page[-1]["id"])
+
+
+def event_page(rows, limit, cursor=None):
+    """Return one page of an event ``values()`` queryset and the cursor for the next page."""
+    return _split_page(list(_page_rows(rows, limit, cursor)), limit)
+
+
+async def aevent_page(rows, limit, cursor=None):
+    """``event_page`` for async views, read with the async ORM."""
+    return _split_page([row async for row in _page_rows(rows, limit, cursor)], limit)
+
+
+def paginated_response(response, next_cursor):
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    return response
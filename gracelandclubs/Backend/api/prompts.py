@@ -0,0 +1,65 @@
+"""Prompt text shared by the funding-form analyzers."""
+import hashlib
+
+# (requirement, yes/no question asked of each form excerpt, how excerpt answers
+# combine, recommendation). "any": met when any excerpt answers yes;
+# "none": met only when no excerpt answers yes.
+REQUIREMENT_CHECKS = [
+    ("Must specify if funding is one-time or recurring",
+     "Does the text say whether the funding is one-time or recurring?",
+     "any", "State whether the funding request is one-time or recurring."),
+    ("All form fields must be filled out",
+     "Does the text contain form fields that are blank or not filled out?",
+     "none", "Fill out every field on the form."),
+    ("Must show alternative funding sources",
+     "Does the text list other or alternative sources of funding?",
+     "any", "List the alternative funding sources the club has pursued."),
+    ("Must benefit a large number of people",
+     "Does the text show that a large number of people will benefit?",
+     "any", "Explain how many people will benefit and who they are."),
+    ("No transportation or gas money reimbursements allowed",
+     "Does the text ask for transportation or gas money reimbursement?",
+     "none", "Remove transportation and gas money reimbursements from the request."),
+    ("Must have specific date for spending",
+     "Does the text give a specific date when the money will be spent?",
+     "any", "Add the specific date the funds will be spent."),
+    ("Must include campus advertising plan",
+     "Does the text describe a plan for advertising on campus?",
+     "any", "Describe how the event will be advertised on campus."),
+]
+
+FUNDING_REQUIREMENTS = (
+    "\nPlease analyze this appropriation form against these requirements:\n"
+    + "".join(f"{number}. {check[0]}\n" for number, check in enumerate(REQUIREMENT_CHECKS, 1))
+    + """
+For each requirement, indicate if it is met or not met. If not met, explain what needs to be added.
+Format your response as a JSON object with 'issues' and 'recommendations' arrays.
+"""
+)
+
+# Changes whenever the requirements or their checks are edited, so cached
+# analyses made against an older version are never served.
+REQUIREMENTS_VERSION = hashlib.sha256(
+    (FUNDING_REQUIREMENTS + repr(REQUIREMENT_CHECKS)).encode("utf-8")
+).hexdigest()[:12]
+
+
+def generate_prompt(form_content: str) -> str:
+    """Generate the prompt for the AI model."""
+    return f"""You are an assistant that analyzes funding request forms. 
+Please analyze the following appropriation form content:
+
+{form_content}
+
+{FUNDING_REQUIREMENTS}
+
+Remember to format your response as a valid JSON object with 'issues' and 'recommendations' arrays."""
+
+
+def generate_check_prompt(excerpt: str, question: str) -> str:
+    """Generate a yes/no prompt checking one requirement against one form excerpt."""
+    return f"""Read this excerpt from a club funding request form.
+
+{excerpt}
+
+Question: {question} Answer yes or no."""
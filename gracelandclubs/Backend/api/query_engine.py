@@ -0,0 +1,273 @@
+"""Bounded, read-only SQL execution for the /api/query/ endpoint.
+
+Each thread reuses one read-only SQLite connection (``mode=ro`` plus
+``PRAGMA query_only``). Queries are stopped by a progress handler once they
+run past the time limit, results come back one page at a time with an opaque
+cursor for the next page, and the total number of rows served is capped.
+
+Queries may be parameterized; since connections are long-lived, SQLite's
+per-connection statement cache lets repeated queries skip re-preparation.
+
+Statements run exactly as written and are paged with ``fetchmany``. When a
+query has more rows, the page after the first keeps its SQLite cursor open on
+a connection of its own for ``RESUME_SECONDS``, so later pages continue where
+the previous one stopped instead of re-running the query and skipping rows.
+That only happens in WAL mode: under a rollback journal an open read cursor
+holds a SHARED lock that blocks every writer.
+
+An authorizer stops queries from reading password hashes and sessions.
+"""
+import base64
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .db_tuning import tune
+
+# How many SQLite VM instructions run between time-limit checks.
+PROGRESS_STEPS = 1000
+
+# Open cursors kept for resuming paged queries: how many, and for how long.
+RESUME_MAX_CURSORS = 32
+RESUME_SECONDS = 60
+
+# Never readable through the engine: whole tables, and single (table, column) pairs.
+DENIED_TABLES = {"django_session"}
+DENIED_COLUMNS = {("api_user", "password")}
+
+_local = threading.local()
+
+
+class QueryError(Exception):
+    """Raised for queries that fail, time out or carry an invalid cursor."""
+
+
+def get_connection(db_path, statement_cache_size=128):
+    """Return this thread's read-only connection to ``db_path``."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    db_path = str(db_path)
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = _connect(db_path, cached_statements=statement_cache_size)
+    return conn
+
+
+def _connect(db_path, **kwargs):
+    if not os.path.exists(db_path):
+        raise QueryError("Database file not found.")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, **kwargs)
+    conn.execute("PRAGMA query_only = ON")
+    conn.set_authorizer(_authorize)
+    return tune(conn, read_only=True)
+
+
+def _authorize(action, table, column, database, source):
+    if action == sqlite3.SQLITE_READ and (table in DENIED_TABLES or (table, column) in DENIED_COLUMNS):
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+def _in_wal_mode(conn):
+    return conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+
+
+def _query_error(error, time_limit):
+    if isinstance(error, sqlite3.OperationalError) and str(error) == "interrupted":
+        return QueryError(f"Query exceeded the {time_limit:g}s time limit.")
+    return QueryError(f"SQL Error: {error}")
+
+
+def _fingerprint(query, params):
+    key = json.dumps([query.strip(), params], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query, offset, params=None, resume=None):
+    payload = {"q": _fingerprint(query, params), "o": offset}
+    if resume:
+        payload["r"] = resume
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, query, params=None, with_resume=False):
+    """Return the row offset a cursor points at, checking it belongs to this query and params.
+
+    With ``with_resume`` also returns the key of its open cursor, if any.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(payload["o"])
+    except (ValueError, KeyError, TypeError):
+        raise QueryError("Invalid cursor.")
+    if payload.get("q") != _fingerprint(query, params) or offset < 0:
+        raise QueryError("Cursor does not belong to this query.")
+    return (offset, payload.get("r")) if with_resume else offset
+
+
+class _OpenCursors:
+    """SQLite cursors left open between pages, each on its own connection.
+
+    An entry is taken out while a page is read from it, so no two requests
+    share one; expired and evicted entries have their connection closed.
+    """
+
+    def __init__(self, max_entries=RESUME_MAX_CURSORS, ttl=RESUME_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, offset):
+        with self.lock:
+            self._expire()
+            entry = self.entries.pop(key, None)
+        if entry and entry["offset"] != offset:
+            entry["conn"].close()
+            return None
+        return entry
+
+    def put(self, entry):
+        key = secrets.token_urlsafe(12)
+        entry["expires"] = time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)[1]["conn"].close()
+        return key
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self.entries.items() if entry["expires"] < now]:
+            self.entries.pop(key)["conn"].close()
+
+
+_open_cursors = _OpenCursors()
+
+
+def explain_query(conn, statement, params):
+    """Return SQLite's EXPLAIN QUERY PLAN rows for a statement."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", params or []).fetchall()
+    return [{"id": row[0], "parent": row[1], "detail": row[3]} for row in rows]
+
+
+def execute_query(db_path, query, params=None, page_size=500, cursor=None, max_rows=50000,
+                  time_limit=2.0, explain=False, statement_cache_size=128):
+    """Run one page of a read-only query and return rows, the next cursor and timing stats.
+
+    With ``explain`` the result also carries SQLite's query plan.
+    """
+    offset, resume = decode_cursor(cursor, query, params, with_resume=True) if cursor else (0, None)
+    if offset >= max_rows:
+        raise QueryError(f"Row limit of {max_rows} reached.")
+    limit = min(page_size, max_rows - offset)
+    statement = query.strip().rstrip(";")
+
+    # ✅ First pages use the thread's connection; later ones resume an open cursor,
+    # or re-run the query once on a connection that can be kept for the pages after
+    shared = get_connection(db_path, statement_cache_size)
+    keep_open = bool(cursor) and _in_wal_mode(shared)
+    entry = _open_cursors.take(resume, offset) if resume else None
+    if entry:
+        conn = entry["conn"]
+    elif keep_open:
+        conn = _connect(str(db_path), check_same_thread=False)
+    else:
+        conn = shared
+    dedicated = conn is not shared
+    deadline = time.monotonic() + time_limit
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+
+    started = time.perf_counter()
+    try:
+        if entry:
+            db_cursor, rows = entry["cursor"], entry["pending"]
+        else:
+            db_cursor, rows = conn.execute(statement, params or []), []
+            skip = offset
+            while skip and db_cursor.fetchmany(min(skip, 1000)):
+                skip -= min(skip, 1000)
+        rows += db_cursor.fetchmany(limit + 1 - len(rows))
+        columns = [description[0] for description in db_cursor.description or []]
+        elapsed = time.perf_counter() - started
+        plan = explain_query(conn, statement, params) if explain else None
+    except sqlite3.Error as e:
+        if dedicated:
+            conn.close()
+        raise _query_error(e, time_limit)
+    finally:
+        conn.set_progress_handler(None, PROGRESS_STEPS)
+
+    has_more = len(rows) > limit
+    rows, pending = rows[:limit], rows[limit:]
+    next_offset = offset + len(rows)
+    truncated = has_more and next_offset >= max_rows
+
+    next_cursor = next_resume = None
+    if has_more and not truncated:
+        if dedicated and keep_open:
+            next_resume = _open_cursors.put({"conn": conn, "cursor": db_cursor, "offset": next_offset, "pending": pending})
+        next_cursor = encode_cursor(query, next_offset, params, next_resume)
+    if next_resume is None:
+        # ✅ Ends the statement's read transaction, so writers are never kept waiting on it
+        db_cursor.close()
+        if dedicated:
+            conn.close()
+
+    result = {
+        "columns": columns,
+        "data": rows,
+        "next_cursor": next_cursor,
+        "stats": {
+            "elapsed_ms": round(1000 * elapsed, 3),
+            "row_count": len(rows),
+            "offset": offset,
+            "truncated": truncated,
+        },
+    }
+    if explain:
+        result["plan"] = plan
+    return result
+
+
+def stream_query(db_path, query, params=None, max_rows=50000, time_limit=2.0, chunk_size=500):
+    """Start a read-only query and return its columns and a generator of row batches.
+
+    The stream gets its own connection, closed when the generator finishes,
+    because a streaming response may be consumed on another thread. The time
+    limit applies to each batch, so slow clients do not trip it.
+    """
+    conn = _connect(str(db_path), check_same_thread=False)
+    deadline = time.monotonic() + time_limit
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+    try:
+        db_cursor = conn.execute(query.strip().rstrip(";"), params or [])
+    except sqlite3.Error as e:
+        conn.close()
+        raise _query_error(e, time_limit)
+    columns = [description[0] for description in db_cursor.description or []]
+
+    def batches():
+        nonlocal deadline
+        served = 0
+        try:
+            while served < max_rows:
+                deadline = time.monotonic() + time_limit
+                rows = db_cursor.fetchmany(min(chunk_size, max_rows - served))
+                if not rows:
+                    return
+                served += len(rows)
+                yield rows
+        except sqlite3.Error as e:
+            raise _query_error(e, time_limit)
+        finally:
+            conn.close()
+
+    return columns, batches()
@@ -0,0 +1,137 @@
+"""Lazy expansion of recurring events into the occurrences of a date window.
+
+A recurring event is stored once: the ``Event`` row (whose date is the first
+occurrence), an ``EventRecurrence`` rule and sparse ``EventException`` rows
+for occurrences that were moved, renamed or cancelled. Listing a window
+fetches the single events in it with the usual indexed range query, fetches
+only the series that can overlap it, and expands those rules in Python with
+``dateutil.rrule``. Cost grows with the number of series, not occurrences.
+
+Rules are expanded in the current time zone so a 7pm meeting stays at 7pm
+across daylight-saving changes; occurrences are returned in UTC.
+"""
+import heapq
+from datetime import timezone as dt_timezone
+
+from dateutil import rrule
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.utils import timezone
+
+from .date_ranges import in_range
+from .models import EventException
+from .pagination import EVENT_ORDERING, decode_cursor, encode_cursor, rows_after
+from .serializers import EventRowSerializer
+
+WEEKDAYS = {"MO": rrule.MO, "TU": rrule.TU, "WE": rrule.WE, "TH": rrule.TH,
+            "FR": rrule.FR, "SA": rrule.SA, "SU": rrule.SU}
+FREQUENCIES = {"weekly": rrule.WEEKLY, "monthly": rrule.MONTHLY}
+
+
+def build_rule(recurrence, start):
+    """The ``dateutil`` rule for a recurrence whose first occurrence is ``start``."""
+    start = timezone.localtime(start)
+    options = {"dtstart": start, "interval": recurrence.interval}
+    if recurrence.weekdays:
+        options["byweekday"] = [WEEKDAYS[day] for day in recurrence.weekdays.split(",")]
+    if recurrence.count:
+        options["count"] = recurrence.count
+    elif recurrence.until:
+        options["until"] = timezone.localtime(recurrence.until)
+    return rrule.rrule(FREQUENCIES[recurrence.frequency], **options)
+
+
+def is_occurrence(recurrence, start, date):
+    """Whether ``date`` is one of the series' occurrences."""
+    local = timezone.localtime(date)
+    return build_rule(recurrence, start).between(local, local, inc=True) != []
+
+
+def _occurrence_row(event, date, original_date, exception=None):
+    return {
+        "id": event.id,
+        "name": (exception and exception.name) or event.name,
+        "description": (exception and exception.description) or event.description,
+        "date": date,
+        "image_url": event.image_url,
+        "club": event.club_id,
+        "club_name": event.club.name,
+        "recurring": True,
+        "original_date": original_date,
+    }
+
+
+def expand(event, start, end):
+    """Yield one row per occurrence of a recurring event in ``[start, end)``, exceptions applied."""
+    recurrence = event.recurrence
+    exceptions = {exception.original_date: exception for exception in recurrence.exceptions.all()}
+
+    for local in build_rule(recurrence, event.date).between(timezone.localtime(start), timezone.localtime(end), inc=True):
+        original = local.astimezone(dt_timezone.utc)
+        if original >= end:
+            break
+        exception = exceptions.get(original)
+        if exception is None:
+            yield _occurrence_row(event, original, original)
+        elif not exception.cancelled and not exception.date:
+            exceptions.pop(original)
+            yield _occurrence_row(event, original, original, exception)
+
+    # ✅ Occurrences moved into (or within) the window; cancelled ones and moves out are skipped here
+    for original, exception in exceptions.items():
+        if not exception.cancelled and exception.date and start <= exception.date < end:
+            yield _occurrence_row(event, exception.date, original, exception)
+
+
+def series_in(queryset, start, end):
+    """Recurring events whose series can have occurrences in ``[start, end)``, with the exceptions that matter."""
+    window = Q(original_date__gte=start, original_date__lt=end) | Q(**in_range(start, end))
+    span = Q(date__lt=end) & (Q(recurrence__until__isnull=True) | Q(recurrence__until__gte=start))
+    # ✅ An occurrence can be moved into the window from before the first date or after ``until``
+    moved_in = Exists(EventException.objects.filter(recurrence__event=OuterRef("pk"), cancelled=False, **in_range(start, end)))
+    return (
+        queryset.filter(recurrence__isnull=False)
+        .filter(span | moved_in)
+        .select_related("club", "recurrence")
+        .prefetch_related(Prefetch("recurrence__exceptions", queryset=EventException.objects.filter(window)))
+    )
+
+
+def _sort_key(row):
+    return row["date"], row["id"]
+
+
+def window_rows(queryset, start, end, limit=None, cursor=None):
+    """Single events and expanded occurrences in ``[start, end)``, ordered by (date, id).
+
+    With ``limit`` returns at most ``limit + 1`` rows after ``cursor``, so the
+    caller can tell whether another page follows.
+    """
+    singles = EventRowSerializer.rows(queryset.filter(recurrence__isnull=True, **in_range(start, end)))
+    singles = singles.order_by(*EVENT_ORDERING)
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        singles = singles.filter(rows_after(*after))
+    if limit is not None:
+        singles = singles[:limit + 1]
+
+    occurrences = sorted(
+        (row for event in series_in(queryset, start, end) for row in expand(event, start, end)),
+        key=_sort_key,
+    )
+    if after and after[0] is not None:
+        occurrences = [row for row in occurrences if _sort_key(row) > after]
+
+    rows = heapq.merge(singles, occurrences, key=_sort_key)
+    if limit is None:
+        return list(rows)
+    return [row for _, row in zip(range(limit + 1), rows)]
+
+
+def window_page(queryset, window, limit, cursor=None):
+    """One keyset page of a window's events and the cursor for the next page."""
+    rows = window_rows(queryset, *window, limit=limit, cursor=cursor)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["date"], rows[-1]["id"])
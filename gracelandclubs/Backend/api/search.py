@@ -0,0 +1,120 @@
+"""Prefix user search backed by an SQLite FTS5 index.
+
+``api_user_search`` holds one row per user (``rowid`` is the user id) with
+their username, email and names. Signals in ``api.signals`` keep it in sync
+as users are saved or deleted. Searches match every query term as a prefix,
+rank with bm25 and come back one page at a time with an opaque cursor. Pages
+of matching ids are cached briefly so typeahead keystrokes that repeat a
+prefix skip the index; any change to a user starts a new cache generation.
+
+On databases without FTS5 the search falls back to ``icontains`` lookups.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+
+from .models import User
+from .query_engine import decode_cursor, encode_cursor
+
+TABLE = "api_user_search"
+COLUMNS = ("username", "email", "first_name", "last_name")
+# bm25 weights per column: a hit on the username or email outranks one on a name.
+WEIGHTS = (10.0, 8.0, 3.0, 3.0)
+
+GENERATION_KEY = "user-search:generation"
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_index_found = False
+
+
+def index_available():
+    """Whether the FTS5 table exists; only a positive answer is remembered."""
+    global _index_found
+    if not _index_found and connection.vendor == "sqlite":
+        _index_found = TABLE in connection.introspection.table_names()
+    return _index_found
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query that matches every term as a prefix."""
+    return " ".join(f'"{term}"*' for term in _TERM.findall(query.lower()))
+
+
+def index_user(user):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [user.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [user.pk, *(getattr(user, column) or "" for column in COLUMNS)],
+        )
+    invalidate()
+
+
+def unindex_user(user_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [user_id])
+    invalidate()
+
+
+def rebuild_index():
+    """Re-index every user, e.g. after bulk updates that skipped signals."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) "
+            f"SELECT id, {', '.join(COLUMNS)} FROM {User._meta.db_table}"
+        )
+        count = cursor.rowcount
+    invalidate()
+    return count
+
+
+def invalidate():
+    """Start a new cache generation so no cached page outlives a user change."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def _matching_ids(query, limit, offset):
+    """Return up to ``limit + 1`` ranked user ids for ``query`` starting at ``offset``."""
+    if not index_available():
+        users = User.objects.filter(Q(email__icontains=query) | Q(username__icontains=query)).order_by("username")
+        return list(users.values_list("id", flat=True)[offset:offset + limit + 1])
+
+    expression = match_expression(query)
+    if not expression:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s "
+            f"ORDER BY bm25({TABLE}, {', '.join(map(str, WEIGHTS))}), rowid LIMIT %s OFFSET %s",
+            [expression, limit + 1, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_user_ids(query, limit, cursor=None):
+    """Return one page of ranked user ids matching ``query`` and the cursor for the next page.
+
+    Raises ``QueryError`` for a cursor that belongs to another query.
+    """
+    query = " ".join(query.lower().split())
+    offset = decode_cursor(cursor, query) if cursor else 0
+
+    generation = cache.get_or_set(GENERATION_KEY, 1, None)
+    digest = hashlib.md5(query.encode("utf-8")).hexdigest()
+    key = f"user-search:{generation}:{limit}:{offset}:{digest}"
+    ids = cache.get(key)
+    if ids is None:
+        ids = _matching_ids(query, limit, offset)
+        cache.set(key, ids, settings.USER_SEARCH_CACHE_SECONDS)
+
+    next_cursor = encode_cursor(query, offset + limit) if len(ids) > limit else None
+    return ids[:limit], next_cursor
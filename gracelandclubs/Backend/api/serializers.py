@@ -2,7 +2,8 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
-from api.models import User, Clubs, Event
+from django.db.models import F, Prefetch
+from api.models import User, Clubs, Event, EventRecurrence, EventException, AnalysisJob
 
 User = get_user_model()  # ✅ CORRECT
 
@@ -21,6 +22,59 @@ class EventSerializer(serializers.ModelSerializer):
         model = Event
         fields = ["id", "name", "description", "date", "image_url", "club", "club_name"]  # ✅ Consistency fix
 
+# ✅ Event Import Serializer (the club comes from the URL, so rows validate without a club lookup)
+class EventImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Event
+        fields = ["name", "description", "date", "image_url"]
+        extra_kwargs = {"description": {"required": False, "allow_blank": True}}  # ✅ Calendar files often have none
+
+# ✅ Recurrence rule of an Event
+class EventRecurrenceSerializer(serializers.ModelSerializer):
+    WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+    class Meta:
+        model = EventRecurrence
+        fields = ["frequency", "interval", "weekdays", "until", "count"]
+
+    def validate_interval(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Interval must be at least 1.")
+        return value
+
+    def validate_weekdays(self, value):
+        days = [day.strip().upper() for day in value.split(",") if day.strip()]
+        unknown = [day for day in days if day not in self.WEEKDAYS]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown weekdays: {', '.join(unknown)}. Use {', '.join(self.WEEKDAYS)}.")
+        return ",".join(days)
+
+    def validate(self, data):
+        if data.get("until") and data.get("count"):
+            raise serializers.ValidationError("Give either 'until' or 'count', not both.")
+        return data
+
+# ✅ One changed or cancelled occurrence of a recurring Event
+class EventExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventException
+        fields = ["original_date", "cancelled", "date", "name", "description"]
+
+# ✅ Read-only Event list rows (same JSON as EventSerializer, without per-row field introspection)
+class EventRowSerializer:
+    fields = ["id", "name", "description", "date", "image_url", "club"]
+
+    @classmethod
+    def rows(cls, queryset):
+        """Event dicts straight from .values(), with the club name joined in the same query."""
+        return queryset.values(*cls.fields, club_name=F("club__name"))
+
+# ✅ Analysis Job Serializer (status/result polling)
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ["id", "status", "priority", "result", "error", "attempts", "created_at", "started_at", "finished_at"]
+
 # ✅ Full User Serializer
 class UserSerializer(serializers.ModelSerializer):
     club_list = ClubSerializer(many=True, read_only=True, source="clubs")  # ✅ Fix: Use related_name="clubs"
@@ -29,6 +83,13 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ["id", "username", "email", "club_list"]  # ✅ Avoid using '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load every user's clubs in one batched query instead of one per user."""
+        return queryset.only("id", "username", "email").prefetch_related(
+            Prefetch("clubs", queryset=Clubs.objects.only(*ClubSerializer.Meta.fields))
+        )
+
 # ✅ User Registration Serializer
 class RegisterSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(
@@ -50,12 +111,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        user = User(
             username=validated_data['username'],
             email=validated_data['email']
         )
         user.set_password(validated_data['password'])  # Hash the password
-        user.save()
+        user.save()  # ✅ One INSERT with the hashed password
         return user
 
 # ✅ User Login Serializer
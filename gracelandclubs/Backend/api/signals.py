@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import event_cache, search
+from .authentication import user_cache
+from .models import Clubs, Event, EventException, EventRecurrence, User
+
+
+@receiver(post_save, sender=User)
+def index_saved_user(sender, instance, raw=False, **kwargs):
+    """Keep the user search index in step with the users table."""
+    if not raw and search.index_available():
+        search.index_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def unindex_deleted_user(sender, instance, **kwargs):
+    if search.index_available():
+        search.unindex_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Authentication must see password, is_active and profile changes right away."""
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_month(sender, instance, raw=False, **kwargs):
+    """Note where an edited event was listed so moving it also refreshes its old month."""
+    instance._previous_listing = None
+    if not raw and instance.pk:
+        instance._previous_listing = (
+            Event.objects.filter(pk=instance.pk).values_list("club_id", "date", "recurrence__id").first()
+        )
+
+
+@receiver(post_save, sender=Event)
+def invalidate_saved_event(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_listing", None)
+    if previous:
+        event_cache.invalidate_dates(previous[0], [previous[1]])
+        if previous[2]:
+            # ✅ Editing a series' event changes every occurrence
+            event_cache.invalidate_series(previous[0])
+            event_cache.invalidate_series(instance.club_id)
+    event_cache.invalidate_dates(instance.club_id, [instance.date])
+
+
+@receiver(post_delete, sender=Event)
+def invalidate_deleted_event(sender, instance, **kwargs):
+    event_cache.invalidate_dates(instance.club_id, [instance.date])
+
+
+@receiver(post_save, sender=Clubs)
+def invalidate_renamed_club(sender, instance, created=False, **kwargs):
+    """Feeds carry the club name, so refresh every month the club has events in."""
+    if not created:
+        for month in Event.objects.filter(club=instance).dates("date", "month"):
+            event_cache.invalidate_month(instance.id, month.year, month.month)
+
+
+def _series_club(recurrence_id):
+    return EventRecurrence.objects.filter(pk=recurrence_id).values_list("event__club_id", flat=True).first()
+
+
+@receiver(post_save, sender=EventRecurrence)
+def invalidate_saved_series(sender, instance, raw=False, **kwargs):
+    if not raw:
+        event_cache.invalidate_series(_series_club(instance.pk))
+
+
+@receiver(pre_delete, sender=EventRecurrence)
+def invalidate_deleted_series(sender, instance, **kwargs):
+    """Look the club up while the event still exists; invalidate once the delete commits."""
+    club_id = _series_club(instance.pk)
+    transaction.on_commit(lambda: event_cache.invalidate_series(club_id))
+
+
+@receiver(post_save, sender=EventException)
+@receiver(post_delete, sender=EventException)
+def invalidate_series_exception(sender, instance, raw=False, **kwargs):
+    if not raw:
+        club_id = _series_club(instance.recurrence_id)
+        if club_id:
+            event_cache.invalidate_series(club_id)
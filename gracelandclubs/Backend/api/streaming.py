@@ -0,0 +1,110 @@
+"""Streaming JSON responses whose memory use stays flat however large the result.
+
+Endpoints opt in with ``?stream=ndjson`` (or ``Accept: application/x-ndjson``)
+for newline-delimited JSON, or ``?stream=json`` for a chunked JSON document
+with the same shape as the non-streaming response.
+
+Under ASGI, Django reads a synchronous iterator into a list before sending
+it. Views pass ``asynchronous=True`` for ASGI requests so the chunks are
+pulled one at a time instead.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+NDJSON = "application/x-ndjson"
+BUFFER_SIZE = 64 * 1024
+
+
+def stream_format(request):
+    """Return ``"ndjson"``, ``"json"`` or None when the client did not ask to stream."""
+    requested = request.GET.get("stream")
+    if requested in ("ndjson", "json"):
+        return requested
+    if NDJSON in request.headers.get("Accept", ""):
+        return "ndjson"
+    return None
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def _ndjson(records, header):
+    if header is not None:
+        yield _dumps(header) + "\n"
+    try:
+        for record in records:
+            yield _dumps(record) + "\n"
+    except Exception as e:
+        yield _dumps({"error": str(e)}) + "\n"
+
+
+def _json_document(records, header):
+    # ✅ With a header, stream {...header, "data": [records]}; without one, a bare array
+    if header:
+        yield _dumps(header)[:-1] + ', "data": ['
+    else:
+        yield "["
+    separator = ""
+    try:
+        for record in records:
+            yield separator + _dumps(record)
+            separator = ","
+    except Exception as e:
+        if not header:
+            raise  # ✅ Leave the array unterminated so the client sees a broken response
+        yield "], " + _dumps({"error": str(e)})[1:]
+        return
+    yield "]}" if header else "]"
+
+
+def buffered(chunks):
+    """Join small text chunks into writes of about BUFFER_SIZE characters."""
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def is_asgi(request):
+    # ✅ DRF views get a Request wrapping Django's
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+async def aiterate(chunks):
+    """Serve a blocking iterator to an async response one chunk at a time.
+
+    Each chunk is fetched on Django's thread-sensitive sync thread, where
+    database cursors opened by the iterator stay usable.
+    """
+    iterator = iter(chunks)
+    fetch = sync_to_async(next)
+    done = object()
+    while (chunk := await fetch(iterator, done)) is not done:
+        yield chunk
+
+
+def streaming_json_response(records, fmt, header=None, asynchronous=False):
+    """Stream ``records`` as NDJSON or as one chunked JSON document."""
+    if fmt == "ndjson":
+        chunks, content_type = buffered(_ndjson(records, header)), NDJSON
+    else:
+        chunks, content_type = buffered(_json_document(records, header)), "application/json"
+    return StreamingHttpResponse(aiterate(chunks) if asynchronous else chunks, content_type=content_type)
+
+
+def streaming_download(chunks, content_type, filename, asynchronous=False):
+    """Stream text ``chunks`` as a file download."""
+    chunks = buffered(chunks)
+    response = StreamingHttpResponse(aiterate(chunks) if asynchronous else chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
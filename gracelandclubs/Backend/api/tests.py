@@ -1,3 +1,1185 @@
-from django.test import TestCase
+import asyncio
+import base64
+import importlib
+import io
+import json
+import os
+import socket
+import struct
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.utils import timezone
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from api.authentication import user_cache
+from api import extraction, jobs
+from api.analysis import analyze_form_text, cached_analysis, store_analysis
+from api.analysis_cache import AnalysisCache
+from api.batching import BatchScheduler
+from api.inference import ModelLoader, load_model, model_id, onnx_export_directory
+from api.chunking import VERDICT_OPTIONS, analyze_in_chunks, chunk_text, merge_verdicts, split_sections
+from api.prompts import REQUIREMENT_CHECKS
+from api.model_server import ModelServer, ModelServerClient, ModelServerError, recv_message, send_message
+from api.event_io import parse_csv, parse_ics
+from api import query_engine
+from api.query_engine import QueryError, execute_query
+from api.models import User, Clubs, Event, AnalysisJob, Membership, NutritionData
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints must cost the same number of queries however many rows they return."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", "owner@example.com")
+        self.club = Clubs.objects.create(owner=self.owner, name="chess")
+        self.other_club = Clubs.objects.create(owner=self.owner, name="drama")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.created = 0
+
+    def add_members(self, count):
+        for _ in range(count):
+            self.created += 1
+            user = User.objects.create_user(f"member{self.created}", f"member{self.created}@example.com")
+            user.clubs.add(self.club, self.other_club)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertQueryCountFlat(self, url):
+        self.add_members(2)
+        small = self.count_queries(url)
+        self.add_members(10)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} issues more queries as results grow ({small} -> {large})")
+
+    def test_club_members(self):
+        self.assertQueryCountFlat("/api/clubs/chess/members/")
+
+    def test_search_users(self):
+        self.assertQueryCountFlat("/api/search-users/?query=member")
+
+    def add_events(self, count):
+        now = timezone.now()
+        for _ in range(count):
+            self.created += 1
+            Event.objects.create(name=f"event{self.created}", description="", date=now, club=self.club)
+
+    def assertEventQueryCountFlat(self, url):
+        self.add_events(2)
+        small = self.count_queries(url)
+        self.add_events(10)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} issues more queries as results grow ({small} -> {large})")
+
+    def test_all_events(self):
+        now = timezone.now()
+        self.assertEventQueryCountFlat(f"/api/events/?year={now.year}&month={now.month}")
+
+    def test_club_events(self):
+        now = timezone.now()
+        self.assertEventQueryCountFlat(f"/api/clubs/chess/{now.year}/{now.month}/events/")
+
+    def test_month_feed_is_cached_until_an_event_changes(self):
+        self.add_events(1)
+        now = timezone.now()
+        url = f"/api/events/?year={now.year}&month={now.month}"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.count_queries(url), 0)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.add_events(1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_event_pages_follow_cursor(self):
+        self.add_events(5)
+        seen, cursor = [], None
+        while True:
+            response = self.client.get("/api/events/", {"limit": 2, **({"cursor": cursor} if cursor else {})})
+            seen += [event["name"] for event in response.json()]
+            cursor = response.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertEqual(seen, [f"event{i}" for i in range(1, 6)])
+
+    def test_tampered_cursor_is_rejected(self):
+        self.add_events(1)
+        for payload in ({"d": "not a date", "i": 1}, {"d": None}):
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            self.assertEqual(self.client.get("/api/events/", {"cursor": cursor}).status_code, 400)
+
+
+class SearchUsersTests(TestCase):
+    def setUp(self):
+        for username in ("john.smith", "johanna", "bob"):
+            User.objects.create_user(username, f"{username}@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(username="bob"))
+
+    def search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [user["username"] for user in response.json()], response.get("X-Next-Cursor")
+
+    def test_prefix_match_pages_and_follows_renames(self):
+        first, cursor = self.search("/api/search-users/?query=jo&limit=1")
+        second, last = self.search(f"/api/search-users/?query=jo&limit=1&cursor={cursor}")
+        self.assertEqual(sorted(first + second), ["johanna", "john.smith"])
+        self.assertIsNone(last)
+
+        bob = User.objects.get(username="bob")
+        bob.username = "jordan"
+        bob.save()
+        self.assertIn("jordan", self.search("/api/search-users/?query=jor")[0])
+
+
+class RecurringEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user("owner", "owner@example.com")
+        club = Clubs.objects.create(owner=owner, name="chess")
+        self.event = Event.objects.create(
+            name="Practice", description="", club=club,
+            date=timezone.make_aware(datetime(2025, 3, 3, 19)),  # a Monday
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+        self.client.put(f"/api/events/{self.event.id}/recurrence/", {"frequency": "weekly", "count": 4}, format="json")
+
+    def dates(self, url):
+        return [event["date"][:10] for event in self.client.get(url).json()]
+
+    def test_series_expands_per_window_with_exceptions(self):
+        self.assertEqual(self.dates("/api/events/?year=2025&month=3"), ["2025-03-03", "2025-03-10", "2025-03-17", "2025-03-24"])
+        self.assertEqual(self.dates("/api/events/?year=2025&month=4"), [])
+
+        self.client.post(
+            f"/api/events/{self.event.id}/exceptions/",
+            {"original_date": "2025-03-10T19:00:00Z", "cancelled": True}, format="json",
+        )
+        self.assertEqual(self.dates("/api/clubs/chess/2025/3/events/"), ["2025-03-03", "2025-03-17", "2025-03-24"])
+
+    def test_occurrence_moved_outside_the_series_span(self):
+        # ✅ The first occurrence moves into February, before the series starts
+        self.client.post(
+            f"/api/events/{self.event.id}/exceptions/",
+            {"original_date": "2025-03-03T19:00:00Z", "date": "2025-02-27T19:00:00Z"}, format="json",
+        )
+        self.assertEqual(self.dates("/api/events/?year=2025&month=2"), ["2025-02-27"])
+        self.assertEqual(self.dates("/api/events/?year=2025&month=3"), ["2025-03-10", "2025-03-17", "2025-03-24"])
+        self.assertEqual(self.dates("/api/events/?start=2025-02-01&end=2025-02-28"), ["2025-02-27"])
+
+    def test_occurrence_moved_within_the_window(self):
+        self.client.post(
+            f"/api/events/{self.event.id}/exceptions/",
+            {"original_date": "2025-03-10T19:00:00Z", "date": "2025-03-12T19:00:00Z"}, format="json",
+        )
+        self.assertEqual(self.dates("/api/events/?year=2025&month=3"), ["2025-03-03", "2025-03-12", "2025-03-17", "2025-03-24"])
+        self.assertEqual(self.dates("/api/events/?start=2025-03-09&end=2025-03-11"), [])
+
+
+class EventImportExportTests(TestCase):
+    ICS = (
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Chess\\, checkers and go\r\n"
+        "DESCRIPTION:Bring a board.\\nSnacks\\; all welc\r\n ome\r\n"
+        "DTSTART:20250310T190000Z\r\nURL:https://example.com/chess.png\r\nEND:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:Spring social\r\nDTSTART;VALUE=DATE:20250321\r\nEND:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    )
+
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user("owner", "owner@example.com")
+        self.club = Clubs.objects.create(owner=owner, name="chess")
+        Clubs.objects.create(owner=owner, name="drama")
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def upload(self, name, content, club="chess"):
+        file = SimpleUploadedFile(name, content.encode())
+        return self.client.post(f"/api/clubs/{club}/events/import/", {"file": file}, format="multipart")
+
+    def events(self, club="chess"):
+        return list(Event.objects.filter(club__name=club).order_by("date").values_list("name", "description", "date"))
+
+    def test_csv_import(self):
+        response = self.upload("events.csv", "name,description,date\nOpen night,,2025-03-10T19:00:00Z\nTournament,Rated,2025-03-15\n")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(self.events(), [
+            ("Open night", "", datetime(2025, 3, 10, 19, tzinfo=dt_timezone.utc)),
+            ("Tournament", "Rated", timezone.make_aware(datetime(2025, 3, 15))),
+        ])
+
+    def test_json_import(self):
+        events = [{"name": "Open night", "date": "2025-03-10T19:00:00Z", "image_url": "https://example.com/a.png"}]
+        response = self.client.post("/api/clubs/chess/events/import/", {"events": events}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Event.objects.get().image_url, "https://example.com/a.png")
+
+        response = self.upload("events.json", json.dumps([{"name": "Tournament", "date": "2025-03-15"}]))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([event[0] for event in self.events()], ["Open night", "Tournament"])
+
+    def test_ics_import_unfolds_and_unescapes(self):
+        response = self.upload("calendar.ics", self.ICS)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.events(), [
+            ("Chess, checkers and go", "Bring a board.\nSnacks; all welcome", datetime(2025, 3, 10, 19, tzinfo=dt_timezone.utc)),
+            ("Spring social", "", timezone.make_aware(datetime(2025, 3, 21))),
+        ])
+
+    def test_invalid_row_rolls_back_the_whole_import(self):
+        response = self.upload("events.csv", "name,date\nOpen night,2025-03-10\n,2025-03-11\nTournament,someday\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data["rows"]), [2, 3])
+        self.assertFalse(Event.objects.exists())
+
+        response = self.upload("events.txt", "Open night")
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_round_trips(self):
+        description = "Bring a board, a clock; and snacks.\n" + " ".join(["Long notes"] * 10)
+        Event.objects.create(name="Open night", description=description, club=self.club,
+                             date=datetime(2025, 3, 10, 19, tzinfo=dt_timezone.utc))
+        Event.objects.create(name="Tournament", description="", club=self.club,
+                             date=datetime(2025, 3, 15, 14, tzinfo=dt_timezone.utc))
+        public = APIClient()  # ✅ Exports are public, like the /api/events/ feed
+
+        response = public.get("/api/clubs/chess/events/export/?type=ics")
+        self.assertEqual(response.status_code, 200)
+        text = b"".join(response.streaming_content).decode()
+        self.assertTrue(all(len(line.encode()) <= 75 for line in text.split("\r\n")), "lines must be folded to 75 octets")
+        self.assertIn("DESCRIPTION:Bring a board\\, a clock\\; and snacks.\\n", text)
+        self.assertEqual([(row["name"], row["description"], row["date"]) for row in parse_ics(text)], self.events())
+
+        response = public.get("/api/clubs/chess/events/export/?type=csv")
+        self.assertEqual(response.status_code, 200)
+        text = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(parse_csv(text)), 2)
+        self.assertEqual(self.upload("chess.csv", text, club="drama").status_code, 201)
+        self.assertEqual(self.events("drama"), self.events())
+
+
+class BulkMembershipTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user("owner", "owner@example.com")
+        self.club = Clubs.objects.create(owner=owner, name="chess")
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+        for name in ("ann", "ben", "cal"):
+            User.objects.create_user(name, f"{name}@example.com")
+        User.objects.get(username="ann").clubs.add(self.club)
+
+    def roster(self, text, action="add"):
+        file = SimpleUploadedFile("roster.csv", text.encode("utf-8-sig"), content_type="text/csv")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/clubs/chess/members/bulk/", {"file": file, "action": action}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def members(self):
+        return sorted(self.club.members.values_list("username", flat=True))
+
+    def test_add_and_remove_from_a_roster_csv(self):
+        data, _ = self.roster("Name,Email\nAnn,ann@example.com\nBen,ben@example.com\nNobody,nobody@example.com\n")
+        self.assertEqual(data["results"], {
+            "ann@example.com": "already_member", "ben@example.com": "added", "nobody@example.com": "not_found",
+        })
+        self.assertEqual(data["summary"], {"already_member": 1, "added": 1, "not_found": 1})
+        self.assertEqual(self.members(), ["ann", "ben"])
+
+        # ✅ Without an "email" header, every cell that looks like an email is read
+        data, _ = self.roster("ben@example.com,cal@example.com\n", action="remove")
+        self.assertEqual(data["results"], {"ben@example.com": "removed", "cal@example.com": "not_member"})
+        self.assertEqual(self.members(), ["ann"])
+
+    def test_emails_match_case_insensitively(self):
+        User.objects.create_user("dee", "Dee@Example.com")
+        data, _ = self.roster("email\nBen@Example.COM\nben@example.com\ndee@example.com\n")
+        self.assertEqual(data["results"], {"Ben@Example.COM": "added", "dee@example.com": "added"})
+        self.assertEqual(self.members(), ["ann", "ben", "dee"])
+
+    def test_add_member_answers_400_for_a_concurrent_duplicate(self):
+        url = "/api/clubs/chess/add-member/"
+        self.assertEqual(self.client.post(url, {"email": "ben@example.com"}, format="json").status_code, 200)
+
+        # ✅ Another request inserted the membership after this one looked for it
+        real_get, raced = QuerySet.get, []
+
+        def get(queryset, *args, **kwargs):
+            if queryset.model is Membership and not raced:
+                raced.append(True)
+                raise Membership.DoesNotExist
+            return real_get(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "get", get):
+            response = self.client.post(url, {"email": "ben@example.com"}, format="json")
+        self.assertTrue(raced)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Membership.objects.filter(club=self.club, user__username="ben").count(), 1)
+
+    def test_query_count_is_flat(self):
+        _, small = self.roster("email\nben@example.com\n")
+        for n in range(10):
+            User.objects.create_user(f"new{n}", f"new{n}@example.com")
+        _, large = self.roster("email\n" + "".join(f"new{n}@example.com\n" for n in range(10)))
+        self.assertEqual(small, large, f"bulk add issues more queries as the roster grows ({small} -> {large})")
+        self.assertEqual(len(self.members()), 12)
+
+
+class LoadNutritionDataTests(TestCase):
+    def load(self, text, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(text)
+        self.addCleanup(os.remove, file.name)
+        out = io.StringIO()
+        call_command("load_nutrion_data", file.name, "--chunk-size", "2", *args, stdout=out)
+        return out.getvalue().splitlines()[-1]
+
+    def calories(self):
+        return dict(NutritionData.objects.values_list("food_name", "calories"))
+
+    def test_reload_skips_existing_foods(self):
+        self.assertIn("3 inserted, 0 skipped", self.load("Food Name,Calories\nApple,52\nBread,265\nRice,130\n"))
+        self.assertIn("1 inserted, 2 skipped", self.load("Food Name,Calories\nApple,60\nRice,140\nOats,389\n"))
+        self.assertEqual(self.calories(), {"Apple": 52, "Bread": 265, "Rice": 130, "Oats": 389})
+
+    def test_upsert_updates_existing_foods(self):
+        self.load("Food Name,Calories\nApple,52\nBread,265\n")
+        self.assertIn("1 inserted, 2 updated", self.load("Food Name,Calories\nApple,60\nBread,270\nOats,389\n", "--upsert"))
+        self.assertEqual(self.calories(), {"Apple": 60, "Bread": 270, "Oats": 389})
+
+    def test_counts_ignore_rows_written_by_others(self):
+        real_bulk_create = QuerySet.bulk_create
+
+        def bulk_create(queryset, records, **kwargs):
+            # ✅ Another loader commits an unrelated food while this chunk is being written
+            NutritionData.objects.create(food_name=f"Other {len(records)}-{NutritionData.objects.count()}")
+            return real_bulk_create(queryset, records, **kwargs)
+
+        with mock.patch.object(QuerySet, "bulk_create", bulk_create), \
+                warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            summary = self.load("Food Name,Calories\nApple,52\nBread,265\nRice,130\n")
+        self.assertIn("3 inserted, 0 skipped", summary)
+        self.assertEqual([str(warning.message) for warning in caught], [])
+
+
+class SQLiteTuningTests(TestCase):
+    @override_settings(SQLITE_BUSY_TIMEOUT_MS=1234)
+    def test_django_connections_are_tuned(self):
+        # ✅ The test database is in memory, which has no WAL, so open a Django connection to a file too
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({**connection.settings_dict, "NAME": os.path.join(directory, "tuned.sqlite3")})
+            try:
+                with wrapper.cursor() as cursor:
+                    self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+                    self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone()[0], 1234)
+            finally:
+                wrapper.close()
+
+
+class AnalysisJobQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("member", "member@example.com")
+
+    def expire_lease(self, job):
+        AnalysisJob.objects.filter(id=job.id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_a_job_is_claimed_once_when_workers_race(self):
+        job = jobs.enqueue("form", self.user)
+        real_deadline, raced = jobs._lease_deadline, []
+
+        def deadline():
+            # ✅ Another worker claims the job between this worker's SELECT and its UPDATE
+            if not raced:
+                raced.append(None)
+                raced.append(jobs.claim_next("worker-a"))
+            return real_deadline()
+
+        with mock.patch("api.jobs._lease_deadline", side_effect=deadline):
+            self.assertIsNone(jobs.claim_next("worker-b"))
+        self.assertEqual(raced[1].id, job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (AnalysisJob.RUNNING, "worker-a", 1))
+
+    def test_expired_lease_is_reclaimed_and_fences_the_old_worker(self):
+        jobs.enqueue("form", self.user)
+        first = jobs.claim_next("worker-a")
+        self.assertIsNone(jobs.claim_next("worker-b"), "a live lease must not be taken over")
+
+        self.expire_lease(first)
+        second = jobs.claim_next("worker-b")
+        self.assertEqual((second.id, second.worker, second.attempts), (first.id, "worker-b", 2))
+
+        # ✅ The first worker finishing late must not overwrite the new attempt
+        with mock.patch("api.jobs.analyze_form_text", return_value={"ok": True}):
+            jobs.run_job(first)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.result), (AnalysisJob.RUNNING, None))
+
+        with mock.patch("api.jobs.analyze_form_text", return_value={"ok": True}):
+            jobs.run_job(second)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.result), (AnalysisJob.SUCCEEDED, {"ok": True}))
+
+    @override_settings(ANALYSIS_JOB_MAX_ATTEMPTS=2)
+    def test_retries_stop_at_max_attempts(self):
+        job = jobs.enqueue("form", self.user)
+        with mock.patch("api.jobs.analyze_form_text", side_effect=RuntimeError("model unavailable")):
+            jobs.run_job(jobs.claim_next("worker-a"))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.error), (AnalysisJob.QUEUED, 1, "model unavailable"))
+
+            jobs.run_job(jobs.claim_next("worker-a"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (AnalysisJob.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(jobs.claim_next("worker-a"))
+
+    @override_settings(ANALYSIS_JOB_MAX_ATTEMPTS=1)
+    def test_crash_on_the_last_attempt_fails_the_job(self):
+        job = jobs.enqueue("form", self.user)
+        self.expire_lease(jobs.claim_next("worker-a"))
+        self.assertIsNone(jobs.claim_next("worker-b"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.FAILED)
+        self.assertEqual(job.error, "Worker stopped before finishing the analysis.")
+
+
+def make_pdf(texts):
+    """A PDF with one line of Helvetica text per page."""
+    writer = PdfWriter()
+    font = DictionaryObject({NameObject("/Type"): NameObject("/Font"), NameObject("/Subtype"): NameObject("/Type1"),
+                             NameObject("/BaseFont"): NameObject("/Helvetica")})
+    for text in texts:
+        page = PageObject.create_blank_page(None, 612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = content
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        writer.add_page(page)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+class ExtractionTests(TestCase):
+    PAGES = [f"Page {i:02d} of the funding form" for i in range(40)]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "form.pdf")
+        with open(self.path, "wb") as file:
+            file.write(make_pdf(self.PAGES))
+
+    def test_stops_reading_pages_at_the_char_budget(self):
+        with mock.patch.object(PageObject, "extract_text", autospec=True, side_effect=lambda page: "x" * 100) as read:
+            with open(self.path, "rb") as file:
+                text = extraction.extract_pdf(file, char_budget=250)
+        self.assertEqual(len(text), 250)
+        self.assertEqual(read.call_count, 3)
+
+    def test_large_pdfs_use_a_spawned_process_pool(self):
+        submitted = []
+        real_pool = extraction._get_pool(2)
+        self.assertEqual(real_pool._mp_context.get_start_method(), "spawn")
+
+        class Pool:
+            def submit(self, fn, *args):
+                submitted.append(args[1:])
+                return real_pool.submit(fn, *args)
+
+        with mock.patch("api.extraction._get_pool", return_value=Pool()):
+            text = extraction.extract_pdf(self.path, parallel_pages=30, workers=2)
+            self.assertEqual(text, " ".join(self.PAGES))
+            self.assertEqual(submitted, [(start, min(start + 8, 40)) for start in range(0, 40, 8)])
+
+            # ✅ The budget is met by the first range, so only the initial two are ever submitted
+            submitted.clear()
+            text = extraction.extract_pdf(self.path, char_budget=50, parallel_pages=30, workers=2)
+        self.assertEqual(text, " ".join(self.PAGES)[:50])
+        self.assertEqual(submitted, [(0, 8), (8, 16)])
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.batches = []
+
+    def submit(self, prompt):
+        return f"generated: {prompt}"
+
+    def submit_many(self, prompts, options=None):
+        self.batches.append((prompts, options))
+        return [prompt.upper() for prompt in prompts]
+
+    def stats(self):
+        return {"batches": len(self.batches)}
+
+
+class ModelServerTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.socket_path = os.path.join(directory.name, "model.sock")
+        self.scheduler = FakeScheduler()
+
+        for target, value in (
+            ("api.model_server.ModelLoader.get_model", mock.Mock(return_value=(None, None))),
+            ("api.model_server.get_scheduler", lambda: self.scheduler),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        server = ModelServer(self.socket_path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.client = ModelServerClient(self.socket_path, timeout=5)
+
+    def raw(self, *frames):
+        """Send raw bytes and return the reply, or None when the server hangs up without one."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.socket_path)
+            for frame in frames:
+                sock.sendall(frame)
+                time.sleep(0.01)
+            try:
+                return recv_message(sock)
+            except ConnectionError:
+                return None
+
+    def test_generate_and_health(self):
+        self.assertEqual(self.client.generate("héllo"), "generated: héllo")
+        health = self.client.health()
+        self.assertEqual((health["status"], health["batching"]), ("ready", {"batches": 0}))
+
+    def test_messages_are_length_prefixed(self):
+        left, right = socket.socketpair()
+        with left, right:
+            send_message(left, {"text": "héllo"})
+            (size,) = struct.unpack("!I", right.recv(4))
+            self.assertEqual(json.loads(right.recv(size)), {"text": "héllo"})
+
+        # ✅ A message split over several writes is read whole
+        body = json.dumps({"op": "generate", "prompt": "split"}).encode()
+        frame = struct.pack("!I", len(body)) + body
+        self.assertEqual(self.raw(frame[:2], frame[2:9], frame[9:]), {"text": "generated: split"})
+
+    def test_error_replies(self):
+        self.assertIsNone(self.raw(struct.pack("!I", 8) + b"not json"))
+        with self.assertRaisesRegex(ModelServerError, "Unknown operation: reboot"):
+            self.client._call({"op": "reboot"})
+        with self.assertRaisesRegex(ModelServerError, "prompt"):
+            self.client._call({"op": "generate"})
+
+    def test_generate_batch_only_passes_allowed_options(self):
+        self.assertEqual(self.client.generate_batch(["a", "b"], max_new_tokens=3, do_sample=False), ["A", "B"])
+        self.assertEqual(self.scheduler.batches, [(["a", "b"], {"max_new_tokens": 3, "do_sample": False})])
+
+        for options in ({"output_hidden_states": True}, {"max_new_tokens": "3"}, {"num_beams": True}):
+            with self.assertRaisesRegex(ModelServerError, "generation option"):
+                self.client.generate_batch(["a"], **options)
+        with self.assertRaisesRegex(ModelServerError, "list of strings"):
+            self.client._call({"op": "generate_batch", "prompts": "a"})
+        self.assertEqual(len(self.scheduler.batches), 1)
+
+
+class WordTokenizer:
+    """One token per word."""
+    model_max_length = 10000
+
+    def __call__(self, text, add_special_tokens=True, **kwargs):
+        return {"input_ids": text.split()}
+
+    def decode(self, ids, skip_special_tokens=False):
+        return " ".join(ids)
+
+
+class ChunkedAnalysisTests(TestCase):
+    ANY = [i for i, check in enumerate(REQUIREMENT_CHECKS) if check[2] == "any"]
+    NONE = [i for i, check in enumerate(REQUIREMENT_CHECKS) if check[2] == "none"]
+
+    def test_sections_split_on_blank_lines_numbers_and_headings(self):
+        text = "Club: Chess\nBudget: $200\n\nItems\n1. Snacks\n2) Prizes\nthat continue here"
+        self.assertEqual(split_sections(text), ["Club: Chess", "Budget: $200", "Items", "1. Snacks", "2) Prizes\nthat continue here"])
+
+    def test_long_sections_split_on_sentences_then_tokens(self):
+        text = "One two three. Four five six seven.\n\n" + " ".join(f"w{i}" for i in range(9))
+        chunks = chunk_text(text, WordTokenizer(), 4)
+        self.assertTrue(all(len(chunk.split()) <= 4 for chunk in chunks), chunks)
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    def test_merge_rules(self):
+        verdicts = [[False, False] for _ in REQUIREMENT_CHECKS]
+        result = merge_verdicts(verdicts)
+        # ✅ "any" requirements need a yes from some chunk; "none" requirements a yes from no chunk
+        self.assertEqual(result["issues"], [f"Requirement not met: {REQUIREMENT_CHECKS[i][0]}" for i in self.ANY])
+
+        for i in self.ANY:
+            verdicts[i] = [False, True]
+        verdicts[self.NONE[0]] = [True, False]
+        result = merge_verdicts(verdicts)
+        self.assertEqual(result["issues"], [f"Requirement not met: {REQUIREMENT_CHECKS[self.NONE[0]][0]}"])
+        self.assertEqual(result["recommendations"], [REQUIREMENT_CHECKS[self.NONE[0]][3]])
+
+    def test_every_check_runs_on_every_chunk(self):
+        calls = []
+
+        def generate(prompts, **options):
+            calls.append((len(prompts), options))
+            return ["Yes" if "alternative" in prompt else "no" for prompt in prompts]
+
+        text = "\n\n".join(" ".join(["word"] * 40) for _ in range(3))
+        result = analyze_in_chunks(text, WordTokenizer(), generate, max_length=80, batch_size=None)
+        self.assertEqual(calls, [(3 * len(REQUIREMENT_CHECKS), VERDICT_OPTIONS)])
+        self.assertNotIn("Requirement not met: Must show alternative funding sources", result["issues"])
+        self.assertEqual(len(result["issues"]), len(self.ANY) - 1)
+
+    def analyze(self, words, model_max_length=10000, **settings_overrides):
+        generated = []
+
+        def generate(prompts, **options):
+            generated.append(options)
+            return ['{"issues": [], "recommendations": []}' if not options else "yes" for _ in prompts]
+
+        tokenizer = WordTokenizer()
+        tokenizer.model_max_length = model_max_length
+        scheduler = BatchScheduler(generate_fn=generate, window=0.01, timeout=5)
+        with override_settings(MODEL_SERVER_SOCKET="", **settings_overrides), \
+                mock.patch("api.analysis.get_analysis_cache", return_value=None), \
+                mock.patch("api.analysis.get_scheduler", return_value=scheduler), \
+                mock.patch.object(ModelLoader, "get_tokenizer", return_value=tokenizer):
+            analyze_form_text(" ".join(["word"] * words))
+        return generated
+
+    def test_long_forms_fall_back_to_chunks_through_the_scheduler(self):
+        self.assertEqual(self.analyze(10, ANALYZE_MAX_INPUT_TOKENS=300), [{}])
+        chunked = self.analyze(400, ANALYZE_MAX_INPUT_TOKENS=300)
+        self.assertTrue(chunked and all(options == VERDICT_OPTIONS for options in chunked), chunked)
+        # ✅ The tokenizer's own limit applies when it is lower than the setting
+        chunked = self.analyze(400, model_max_length=300)
+        self.assertTrue(chunked and all(options == VERDICT_OPTIONS for options in chunked), chunked)
+
+
+class DateRangeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user("owner", "owner@example.com")
+        club = Clubs.objects.create(owner=owner, name="chess")
+        for name, moment in (("feb-28", (2, 28, 23, 59)), ("mar-1", (3, 1, 0, 30)), ("mar-7", (3, 7, 23, 0)),
+                             ("mar-8", (3, 8, 0, 0)), ("apr-1", (4, 1, 0, 0))):
+            month, day, hour, minute = moment
+            Event.objects.create(name=name, description="", club=club,
+                                 date=timezone.make_aware(datetime(2025, month, day, hour, minute)))
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def names(self, query):
+        response = self.client.get(f"/api/events/?{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+        return [event["name"] for event in response.json()]
+
+    def test_months_and_ranges_are_half_open(self):
+        self.assertEqual(self.names("year=2025&month=3"), ["mar-1", "mar-7", "mar-8"])
+        self.assertEqual(self.names("year=2024&month=12"), [])
+        # ✅ A bare end date covers that whole day; an end datetime is exclusive
+        self.assertEqual(self.names("start=2025-03-01&end=2025-03-07"), ["mar-1", "mar-7"])
+        self.assertEqual(self.names("start=2025-02-28T23:59:00&end=2025-03-08T00:00:00"), ["feb-28", "mar-1", "mar-7"])
+
+    @override_settings(EVENT_RANGE_MAX_DAYS=31)
+    def test_invalid_months_and_ranges_are_rejected(self):
+        for query in ("year=2025&month=13", "year=2025&month=0", "year=2025&month=march", "year=twenty&month=3",
+                      "start=2025-03-01", "end=2025-03-01", "start=2025-03-07&end=2025-03-01",
+                      "start=2025-03-01&end=someday", "start=2025-01-01&end=2025-03-01"):
+            response = self.client.get(f"/api/events/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn("error", response.json())
+        self.assertEqual(self.client.get("/api/clubs/chess/2025/13/events/").status_code, 400)
+
+
+class InferenceBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.model_directory = os.path.join(directory.name, "flan-t5")
+
+    def test_int8_quantizes_linear_layers(self):
+        import torch
+
+        model = torch.nn.Sequential(torch.nn.Linear(4, 4))
+        with mock.patch("api.inference.AutoModelForSeq2SeqLM.from_pretrained", return_value=model), \
+                warnings.catch_warnings():
+            warnings.filterwarnings("ignore", "torch.quantize_per_tensor", UserWarning)
+            quantized = load_model(self.model_directory, "int8")
+        self.assertIsInstance(quantized[0], torch.ao.nn.quantized.dynamic.Linear)
+
+    def test_onnx_export_is_created_once_and_reused(self):
+        ort_model = mock.Mock()
+        onnxruntime = mock.Mock(ORTModelForSeq2SeqLM=ort_model)
+        export_directory = onnx_export_directory(self.model_directory)
+        self.assertEqual(str(export_directory), f"{self.model_directory}-onnx")
+
+        with mock.patch.dict(sys.modules, {"optimum": mock.Mock(), "optimum.onnxruntime": onnxruntime}):
+            load_model(self.model_directory, "onnx")
+            ort_model.from_pretrained.assert_called_once_with(self.model_directory, export=True)
+            ort_model.from_pretrained.return_value.save_pretrained.assert_called_once_with(export_directory)
+
+            export_directory.mkdir()
+            (export_directory / "encoder_model.onnx").touch()
+            ort_model.reset_mock()
+            load_model(self.model_directory, "onnx")
+            ort_model.from_pretrained.assert_called_once_with(export_directory)
+
+    def test_missing_backends_are_reported(self):
+        with mock.patch.dict(sys.modules, {"optimum.onnxruntime": None}):
+            with self.assertRaisesRegex(ImportError, "optimum"):
+                load_model(self.model_directory, "onnx")
+        with self.assertRaisesRegex(ValueError, "Unknown inference backend 'tpu'"):
+            load_model(self.model_directory, "tpu")
+
+    @override_settings(MODEL_DIRECTORY="/models/flan-t5-base", INFERENCE_BACKEND="int8")
+    def test_model_id_names_the_backend(self):
+        # ✅ Cached analyses from one backend are not served for another
+        self.assertEqual(model_id(), "flan-t5-base:int8")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user("member", "member@example.com")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_cached_user_is_dropped_when_the_user_changes(self):
+        self.assertEqual(self.client.get("/api/user/").status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/user/")
+        self.assertFalse(any('FROM "api_user"' in query["sql"] for query in queries), "the user should come from the cache")
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/user/").status_code, 401)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class RegisterTests(TestCase):
+    def test_register_returns_a_token_and_rejects_duplicates(self):
+        payload = {"username": "newbie", "email": "newbie@example.com", "password": "S3cure-pass!", "password2": "S3cure-pass!"}
+        response = APIClient().post("/api/register/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("access", response.data["token"])
+        self.assertTrue(User.objects.get(username="newbie").password.startswith("pbkdf2_sha256$1000$"))
+
+        response = APIClient().post("/api/register/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.data)
+
+
+class AsyncEventFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", "owner@example.com")
+        self.club = Clubs.objects.create(owner=self.owner, name="chess")
+        Event.objects.create(name="open", description="", date=timezone.now(), club=self.club)
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.owner)}"}
+
+    async def test_club_feed_over_asgi(self):
+        now = timezone.now()
+        url = f"/api/clubs/chess/{now.year}/{now.month}/events/"
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+        response = await self.async_client.get(url, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event["name"] for event in response.json()], ["open"])
+
+        cached = await self.async_client.get(url, headers={**self.auth, "If-None-Match": response["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_month_stream_over_asgi(self):
+        now = timezone.now()
+        response = await self.async_client.get(f"/api/events/?year={now.year}&month={now.month}&stream=ndjson")
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join([chunk async for chunk in response]).decode().splitlines()
+        self.assertEqual([json.loads(line)["name"] for line in lines], ["open"])
+
+    async def test_export_streams_over_asgi_without_buffering(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            response = await self.async_client.get("/api/clubs/chess/events/export/?type=csv")
+            body = b"".join([chunk async for chunk in response]).decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(",open,", body)
+        self.assertFalse([w for w in caught if "synchronous iterators" in str(w.message)])
+
+    def test_month_stream_over_wsgi(self):
+        now = timezone.now()
+        response = self.client.get(f"/api/events/?year={now.year}&month={now.month}&stream=ndjson")
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["name"] for line in lines], ["open"])
+
+
+class AnalysisCacheTests(TestCase):
+    ANALYSIS = {"issues": [], "recommendations": []}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "analysis_cache.sqlite3")
+        self.now = 1000.0
+        clock = mock.patch("api.analysis_cache.time", mock.Mock(time=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = AnalysisCache(self.path, ttl=60)
+        cache.set("form", "v1", "model", self.ANALYSIS)
+        self.now += 59
+        self.assertEqual(cache.get("form  ", "v1", "model"), self.ANALYSIS)  # ✅ Whitespace is normalized
+        self.now += 2
+        self.assertIsNone(cache.get("form", "v1", "model"))
+        self.now -= 2
+        self.assertIsNone(cache.get("form", "v1", "model"), "expired entries are deleted on read")
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = AnalysisCache(self.path, ttl=0, max_entries=2)
+        for text in ("a", "b"):
+            self.now += 1
+            cache.set(text, "v1", "model", {"text": text})
+        self.now += 1
+        cache.get("a", "v1", "model")
+        self.now += 1
+        cache.set("c", "v1", "model", {"text": "c"})
+        self.assertEqual([cache.get(text, "v1", "model") for text in "abc"], [{"text": "a"}, None, {"text": "c"}])
+
+    def test_purge_stale_drops_old_versions_and_expired_entries(self):
+        cache = AnalysisCache(self.path, ttl=60)
+        cache.set("old prompt", "v1", "model", self.ANALYSIS)
+        cache.set("expired", "v2", "model", self.ANALYSIS)
+        self.now += 50
+        cache.set("fresh", "v1", "model", self.ANALYSIS)
+        cache.set("fresh", "v2", "model", self.ANALYSIS)
+        self.now += 20
+        self.assertEqual(cache.purge_stale("v2"), 3)
+        self.assertEqual(cache.get("fresh", "v2", "model"), self.ANALYSIS)
+        self.assertIsNone(cache.get("fresh", "v1", "model"))
+
+    def test_key_depends_on_the_requirements_version(self):
+        cache = AnalysisCache(self.path)
+        with mock.patch("api.analysis.get_analysis_cache", return_value=cache), \
+                mock.patch("api.analysis.model_id", return_value="model"):
+            store_analysis("form", self.ANALYSIS)
+            store_analysis("broken form", {"issues": ["Error calling OpenAI API: timeout"]})
+            self.assertEqual(cached_analysis("form"), self.ANALYSIS)
+            self.assertIsNone(cached_analysis("broken form"), "error placeholders are not cached")
+            with mock.patch("api.analysis.REQUIREMENTS_VERSION", "edited"):
+                self.assertIsNone(cached_analysis("form"))
+
+
+class StubOpenAIServer(ThreadingHTTPServer):
+    """A local stand-in for the OpenAI chat completions API.
+
+    Each request waits ``latency`` seconds; queued ``failures`` status codes are
+    answered first. Records the number of calls and the peak concurrency.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0.05):
+        super().__init__(("127.0.0.1", 0), StubOpenAIHandler)
+        self.latency = latency
+        self.failures = []
+        self.calls = self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.calls += 1
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            failure = server.failures.pop(0) if server.failures else None
+        time.sleep(server.latency)
+        with server.lock:
+            server.active -= 1
+
+        if failure:
+            self.reply(failure, {"error": {"message": "stub failure", "type": "server_error"}}, {"Retry-After": "0"})
+        else:
+            content = json.dumps({"issues": [], "recommendations": ["stub"]})
+            self.reply(200, {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            })
+
+    def reply(self, status_code, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        for name, value in {"Content-Type": "application/json", "Content-Length": str(len(payload)), **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class FundingCheckerAITests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "ANALYSIS_CACHE_PATH": ""}):
+            cls.checker = importlib.import_module("api.FundingCheckerAI")
+
+    @classmethod
+    def reload_checker(cls):
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "ANALYSIS_CACHE_PATH": ""}):
+            importlib.reload(cls.checker)
+
+    def setUp(self):
+        self.server = StubOpenAIServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        for name, value in {"OPENAI_BASE_URL": self.server.base_url, "OPENAI_RETRY_BASE_DELAY": 0.01}.items():
+            patcher = mock.patch.object(self.checker, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_async(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await self.checker.close_client()
+        return asyncio.run(run())
+
+    def test_concurrent_uploads_share_a_bounded_pool(self):
+        import httpx
+
+        async def upload_all(count):
+            transport = httpx.ASGITransport(app=self.checker.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://checker") as client:
+                return await asyncio.gather(*[
+                    client.post("/analyze-form", files={"file": (f"form{i}.txt", f"Form {i}: budget $100".encode(), "text/plain")})
+                    for i in range(count)
+                ])
+
+        with mock.patch.object(self.checker, "OPENAI_MAX_IN_FLIGHT", 4):
+            started = time.perf_counter()
+            responses = self.run_async(upload_all(40))
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual({response.json()["recommendations"][0] for response in responses}, {"stub"})
+        self.assertEqual(self.server.calls, 40)
+        self.assertLessEqual(self.server.peak, 4)
+        self.assertGreater(self.server.peak, 1, "completions should overlap instead of blocking the event loop")
+        self.assertLess(elapsed, 40 * self.server.latency)
+
+    def test_cache_defaults_to_the_django_file_and_opens_lazily(self):
+        environ = {name: value for name, value in os.environ.items() if name != "ANALYSIS_CACHE_PATH"}
+        with mock.patch.dict(os.environ, {**environ, "OPENAI_API_KEY": "test-key"}, clear=True):
+            checker = importlib.reload(self.checker)
+        self.addCleanup(self.reload_checker)
+        self.assertEqual(checker.ANALYSIS_CACHE_PATH, settings.ANALYSIS_CACHE_PATH)
+        self.assertIsNone(checker._cache)
+
+    def test_retries_429_and_5xx_but_not_other_errors(self):
+        self.server.failures = [429, 503]
+        self.assertEqual(self.run_async(self.checker.analyze_with_openai("prompt"))["recommendations"], ["stub"])
+        self.assertEqual(self.server.calls, 3)
+
+        self.server.failures = [400]
+        result = self.run_async(self.checker.analyze_with_openai("prompt"))
+        self.assertIn("Error calling OpenAI API", result["issues"][0])
+        self.assertEqual(self.server.calls, 4)
+
+
+class QueryEngineTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db_path = os.path.join(directory.name, "query.sqlite3")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, club_id INTEGER)")
+        conn.executemany("INSERT INTO item (club_id) VALUES (?)", [(i % 3,) for i in range(25)])
+        conn.execute("CREATE TABLE api_user (id INTEGER PRIMARY KEY, username TEXT, password TEXT)")
+        conn.execute("INSERT INTO api_user (username, password) VALUES ('ann', 'pbkdf2_sha256$hash')")
+        conn.commit()
+        conn.close()
+        self.user = User.objects.create_user("member", "member@example.com")
+
+    def post(self, payload, path="/api/query/"):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch.dict(settings.DATABASES["default"], {"NAME": self.db_path}):
+            return client.post(path, payload, format="json")
+
+    def second_page(self):
+        query = "SELECT id FROM item ORDER BY id"
+        first = execute_query(self.db_path, query, page_size=4)
+        return execute_query(self.db_path, query, page_size=4, cursor=first["next_cursor"])
+
+    def test_requires_authentication(self):
+        response = self.client.post("/api/query/", {"query": "SELECT 1"}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_passwords_cannot_be_read(self):
+        self.assertEqual(execute_query(self.db_path, "SELECT username FROM api_user")["data"], [("ann",)])
+        for query in ("SELECT password FROM api_user", "SELECT * FROM api_user",
+                      "SELECT id FROM api_user WHERE password LIKE 'pbkdf2%'"):
+            with self.assertRaisesRegex(QueryError, "prohibited"):
+                execute_query(self.db_path, query)
+
+    def test_open_cursors_only_in_wal_mode(self):
+        self.addCleanup(query_engine._open_cursors.entries.clear)
+        self.assertIsNotNone(self.second_page()["next_cursor"])
+        self.assertEqual(len(query_engine._open_cursors.entries), 0)
+        # ✅ No read lock is left behind, so a writer gets in at once
+        writer = sqlite3.connect(self.db_path, timeout=0)
+        writer.execute("INSERT INTO item (club_id) VALUES (0)")
+        writer.commit()
+
+        writer.execute("PRAGMA journal_mode = WAL")
+        writer.close()
+        self.second_page()
+        entry = next(iter(query_engine._open_cursors.entries.values()))
+        self.addCleanup(entry["conn"].close)
+
+    def test_statements_run_as_written(self):
+        result = execute_query(self.db_path, "SELECT 1 AS a -- note")
+        self.assertEqual((result["columns"], result["data"]), (["a"], [(1,)]))
+
+        result = execute_query(self.db_path, "SELECT u.id, c.id FROM item u JOIN item c ON c.id = u.id + 1 LIMIT 1")
+        self.assertEqual(result["columns"], ["id", "id"])
+
+    def test_pages_cover_every_row_once(self):
+        query, seen, cursor, pages = "SELECT id FROM item ORDER BY id", [], None, 0
+        while True:
+            result = execute_query(self.db_path, query, page_size=4, cursor=cursor)
+            seen += [row[0] for row in result["data"]]
+            pages += 1
+            cursor = result["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, list(range(1, 26)))
+        self.assertEqual(pages, 7)
+
+    def test_params_are_bound_not_interpolated(self):
+        response = self.post({"query": "SELECT id FROM item WHERE club_id = ? ORDER BY id LIMIT 2", "params": [1]})
+        self.assertEqual(response.json()["data"], [[2], [5]])
+        response = self.post({"query": "SELECT COUNT(*) FROM item WHERE club_id = :club", "params": {"club": 2}})
+        self.assertEqual(response.json()["data"], [[8]])
+
+        for injection in ("1 OR 1=1", "1; DROP TABLE item"):
+            response = self.post({"query": "SELECT id FROM item WHERE club_id = ?", "params": [injection]})
+            self.assertEqual((response.status_code, response.json()["data"]), (200, []))
+        self.assertEqual(self.post({"query": "SELECT COUNT(*) FROM item"}).json()["data"], [[25]])
+
+        self.assertEqual(self.post({"query": "DELETE FROM item"}).status_code, 400)
+        self.assertEqual(self.post({"query": "SELECT 1", "params": "1"}).status_code, 400)
+        self.assertEqual(self.post({"query": "SELECT ?", "params": []}).status_code, 400)
+
+    def test_explain_returns_the_query_plan(self):
+        response = self.post({"query": "SELECT id FROM item WHERE id = ?", "params": [3], "explain": True})
+        self.assertEqual(response.json()["data"], [[3]])
+        self.assertTrue(response.json()["plan"][0]["detail"].startswith("SEARCH item USING INTEGER PRIMARY KEY"))
+        self.assertNotIn("plan", self.post({"query": "SELECT 1"}).json())
+
+    def test_connection_and_its_statement_cache_are_reused(self):
+        conn = query_engine.get_connection(self.db_path)
+        execute_query(self.db_path, "SELECT id FROM item WHERE club_id = ?", params=[1])
+        self.assertIs(query_engine.get_connection(self.db_path), conn)
+        # ✅ sqlite3 keeps prepared statements per connection, so the repeat skips preparation
+        with mock.patch.object(query_engine, "_connect", side_effect=AssertionError("reconnected")):
+            execute_query(self.db_path, "SELECT id FROM item WHERE club_id = ?", params=[2])
+
+    @override_settings(QUERY_MAX_ROWS=10, STREAM_CHUNK_SIZE=4)
+    def test_streams_stop_at_the_row_limit(self):
+        response = self.post({"query": "SELECT id FROM item ORDER BY id"}, "/api/query/?stream=ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines, [{"columns": ["id"]}] + [[i] for i in range(1, 11)])
+
+        response = self.post({"query": "SELECT id FROM item ORDER BY id"}, "/api/query/?stream=json")
+        document = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(document, {"columns": ["id"], "data": [[i] for i in range(1, 11)]})
+
+        self.assertEqual(self.post({"query": "SELECT nope FROM item"}, "/api/query/?stream=ndjson").status_code, 400)
+
+    async def test_stream_over_asgi_without_buffering(self):
+        with mock.patch.dict(settings.DATABASES["default"], {"NAME": self.db_path}), \
+                warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            response = await self.async_client.post(
+                "/api/query/?stream=ndjson", {"query": "SELECT id FROM item"}, content_type="application/json",
+                headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+            )
+            lines = b"".join([chunk async for chunk in response]).decode().splitlines()
+        self.assertEqual(json.loads(lines[0]), {"columns": ["id"]})
+        self.assertEqual(len(lines), 26)
+        self.assertFalse([w for w in caught if "synchronous iterators" in str(w.message)])
+
+
+class BatchSchedulerTests(TestCase):
+    def test_missing_outputs_fail_their_prompts(self):
+        scheduler = BatchScheduler(generate_fn=lambda prompts: prompts[:1], window=0.05, max_batch_size=2)
+        first, second = scheduler.enqueue("a"), scheduler.enqueue("b")
+        self.assertEqual(first.result(timeout=5), "a")
+        with self.assertRaises(RuntimeError):
+            second.result(timeout=5)
+
+    def test_prompts_are_batched_per_generation_options(self):
+        calls = []
+        scheduler = BatchScheduler(generate_fn=lambda prompts, **options: calls.append((prompts, options)) or prompts,
+                                   window=0.05, max_batch_size=8)
+        single = scheduler.enqueue("form")
+        self.assertEqual(scheduler.submit_many(["a", "b"], options={"max_new_tokens": 3}), ["a", "b"])
+        self.assertEqual(single.result(timeout=5), "form")
+        self.assertCountEqual(calls, [(["form"], {}), (["a", "b"], {"max_new_tokens": 3})])
+
+    def test_submit_gives_up_after_the_timeout(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        scheduler = BatchScheduler(generate_fn=lambda prompts: release.wait() and prompts, window=0, timeout=0.05)
+        with self.assertRaises(TimeoutError):
+            scheduler.submit("a")
@@ -1,9 +1,11 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
-    execute_sql_query, ClubMembersView,AnalyzeFormView, RegisterView, LoginView, AllEventsView,
-    UserDetailView, EventDetailView, SearchUsersView, AddMemberView,
-    EventListCreateView  # ✅ Make sure this is imported
+    execute_sql_query, ClubMembersView, analyze_form, AnalyzeFormMetricsView,
+    AnalysisJobView, analysis_job_events, RegisterView, LoginView, all_events,
+    UserDetailView, EventDetailView, EventImportView, EventExportView,
+    EventRecurrenceView, EventExceptionView, SearchUsersView, AddMemberView, BulkMembershipView,
+    club_events  # ✅ Async under ASGI, like analyze_form, analysis_job_events and all_events
 )
 
 urlpatterns = [
@@ -15,14 +17,24 @@ urlpatterns = [
     # --- User Endpoints ---
     path("user/", UserDetailView.as_view(), name="user_detail"),  # ✅ Fetch logged-in user details
     path("clubs/<slug:club_name>/members/", ClubMembersView.as_view(), name="club-members"),
-    path("api/analyze-form/", AnalyzeFormView.as_view(), name="analyze-form"),
+    path("api/analyze-form/", analyze_form, name="analyze-form"),
+    path("api/analyze-form/metrics/", AnalyzeFormMetricsView.as_view(), name="analyze-form-metrics"),
+    path("api/analyze-form/jobs/<int:job_id>/", AnalysisJobView.as_view(), name="analysis-job"),
+    path("api/analyze-form/jobs/<int:job_id>/events/", analysis_job_events, name="analysis-job-events"),
 
     # --- Event Endpoints ---
-    path("events/", AllEventsView.as_view(), name="all-events"),  # ✅ NEW ENDPOINT FOR ALL EVENTS
+    path("events/", all_events, name="all-events"),  # ✅ NEW ENDPOINT FOR ALL EVENTS
+    path("events/export/", EventExportView.as_view(), name="events-export"),
     path("events/<int:event_id>/", EventDetailView.as_view(), name="event-detail"),  # ✅ Event detail endpoint
-    path("clubs/<slug:club_name>/<int:year>/<int:month>/events/", EventListCreateView.as_view(), name="event-list-by-date"),  # ✅ FIXED: Added missing endpoint
+    path("events/<int:event_id>/recurrence/", EventRecurrenceView.as_view(), name="event-recurrence"),
+    path("events/<int:event_id>/exceptions/", EventExceptionView.as_view(), name="event-exceptions"),
+    path("clubs/<slug:club_name>/events/", club_events, name="event-list"),  # ✅ ?start=&end= window
+    path("clubs/<slug:club_name>/events/import/", EventImportView.as_view(), name="club-events-import"),
+    path("clubs/<slug:club_name>/events/export/", EventExportView.as_view(), name="club-events-export"),
+    path("clubs/<slug:club_name>/<int:year>/<int:month>/events/", club_events, name="event-list-by-date"),  # ✅ FIXED: Added missing endpoint
     path("search-users/", SearchUsersView.as_view(), name="search-users"),
     path("clubs/<slug:club_name>/add-member/", AddMemberView.as_view(), name="add-member"),
+    path("clubs/<slug:club_name>/members/bulk/", BulkMembershipView.as_view(), name="bulk-members"),
 
     # --- AI & SQL Query Endpoints ---
     path("query/", execute_sql_query, name="execute_sql_query"),  # ✅ SQL query execution
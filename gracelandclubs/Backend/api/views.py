@@ -1,31 +1,51 @@
 import os
 import io
+import csv
 import json
-import sqlite3
-import torch
 import re
+import time
+import functools
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
+from django.db import transaction
+from django.db.models.functions import Lower
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.hashers import make_password
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_http_methods, require_POST, require_safe
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework_simplejwt.tokens import RefreshToken
 from urllib.parse import unquote_plus
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, BitsAndBytesConfig
-from api.models import User, Clubs, Event
-from .serializers import RegisterSerializer, EventSerializer, LoginSerializer, UserSerializer
+from api.models import User, Clubs, Event, EventRecurrence, EventException, AnalysisJob, Membership
+from .serializers import RegisterSerializer, EventSerializer, EventRowSerializer, EventRecurrenceSerializer, EventExceptionSerializer, LoginSerializer, UserSerializer, AnalysisJobSerializer
+from . import event_io, jobs
+from .analysis import aanalyze_form_text
+from .authentication import aauthenticate
+from .executor import run_blocking
+from .batching import get_scheduler
+from .inference import ModelLoader
+from .model_server import ModelServerClient, ModelServerError
+from .extraction import extract_text
+from .query_engine import QueryError, execute_query, stream_query
+from .search import search_user_ids
+from .date_ranges import month_range, parse_bound, parse_range
+from .pagination import EVENT_ORDERING, aevent_page, paginated_response
+from .event_cache import ALL as ALL_EVENTS, acached_feed, etag_matches
+from .recurrence import is_occurrence, window_page, window_rows
+from .streaming import is_asgi, stream_format, streaming_download, streaming_json_response
 from django.db.utils import IntegrityError
 from rest_framework import generics
 from django.shortcuts import get_object_or_404
-import docx
-from PyPDF2 import PdfReader
 
 # --- Utility Functions ---
 def get_tokens_for_user(user):
@@ -33,46 +53,168 @@ def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
     return {'refresh': str(refresh), 'access': str(refresh.access_token)}
 
-def fetch_data_from_sql(query, db_path):
-    """Execute a SQL query and return structured results."""
+def fetch_data_from_sql(query, db_path, params=None, cursor=None, page_size=None, explain=False):
+    """Execute a read-only SQL query and return one page of structured results."""
+    page_size = min(page_size or settings.QUERY_PAGE_SIZE, settings.QUERY_MAX_PAGE_SIZE)
     try:
-        if not os.path.exists(db_path):
-            return {"error": "Database file not found."}
-        
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-        
-        return {"columns": columns, "data": rows}
-    
-    except sqlite3.Error as e:
-        return {"error": f"SQL Error: {str(e)}"}
+        return execute_query(
+            db_path,
+            query,
+            params=params,
+            page_size=page_size,
+            cursor=cursor,
+            max_rows=settings.QUERY_MAX_ROWS,
+            time_limit=settings.QUERY_TIME_LIMIT_MS / 1000,
+            explain=explain,
+            statement_cache_size=settings.QUERY_STATEMENT_CACHE_SIZE,
+        )
+    except QueryError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"General Error: {str(e)}"}
 
-# --- AI Model Setup ---
-class ModelLoader:
-    """Lazily load the AI model and tokenizer to save memory."""
-    model = None
-    tokenizer = None
-
-    @classmethod
-    def get_model(cls):
-        if cls.model is None or cls.tokenizer is None:
+def read_roster_emails(file):
+    """Read emails from a roster CSV: its "email" column, or every cell containing an @."""
+    rows = list(csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig")))
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "email" in header:
+        column = header.index("email")
+        return [row[column] for row in rows[1:] if len(row) > column]
+    return [cell for row in rows for cell in row if "@" in cell]
+
+def bulk_update_memberships(club, emails, action):
+    """Add or remove members by email in a fixed number of queries.
+
+    Emails match case-insensitively. Returns each email's outcome: added,
+    already_member, removed, not_member or not_found.
+    """
+    with transaction.atomic():
+        user_ids = dict(
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in={email.lower() for email in emails})
+            .values_list("email_lower", "id")
+        )
+        existing = set(
+            Membership.objects.filter(club=club, user_id__in=user_ids.values()).values_list("user_id", flat=True)
+        )
+
+        if action == "add":
+            Membership.objects.bulk_create(
+                [Membership(club=club, user_id=user_id) for user_id in user_ids.values() if user_id not in existing],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+        else:
+            Membership.objects.filter(club=club, user_id__in=existing).delete()
+
+    results = {}
+    for email in emails:
+        user_id = user_ids.get(email.lower())
+        if user_id is None:
+            results[email] = "not_found"
+        elif action == "add":
+            results[email] = "already_member" if user_id in existing else "added"
+        else:
+            results[email] = "removed" if user_id in existing else "not_member"
+    return results
+
+def extract_form_text(file, file_type: str) -> str:
+    """Extract text from different file formats."""
+    try:
+        return extract_text(
+            file,
+            file_type,
+            char_budget=settings.EXTRACTION_CHAR_BUDGET,
+            parallel_pages=settings.EXTRACTION_PARALLEL_PAGES,
+            workers=settings.EXTRACTION_WORKERS,
+        )
+    except Exception as e:
+        return f"Error extracting text: {str(e)}"
+
+def event_window(request, year=None, month=None):
+    """Return the [start, end) datetimes asked for by year/month or ?start=&end=, or None for no filter.
+
+    Raises ValueError for malformed or oversized ranges.
+    """
+    if year and month:
+        return month_range(year, month)
+    start, end = request.GET.get("start"), request.GET.get("end")
+    if start or end:
+        return parse_range(start, end)
+    return None
+
+def jwt_required(stateless_reads=False):
+    """Authenticate an async view's JWT into ``request.user``, answering 401 without a valid one."""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
             try:
-                cls.tokenizer = AutoTokenizer.from_pretrained(settings.MODEL_DIRECTORY)
-                cls.model = AutoModelForSeq2SeqLM.from_pretrained(
-                    settings.MODEL_DIRECTORY,
-                    device_map='auto'
-                )
-            except Exception as e:
-                raise ImportError(f"Could not load AI model: {str(e)}")
-        return cls.model, cls.tokenizer
+                user = await aauthenticate(request, stateless=stateless_reads)
+            except AuthenticationFailed as e:
+                detail = e.detail.get("detail", e.detail) if isinstance(e.detail, dict) else e.detail
+                return JsonResponse({"error": str(detail)}, status=401)
+            if user is None:
+                return JsonResponse({"error": "Authentication credentials were not provided."}, status=401)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def page_params(request):
+    """The ?limit= (capped at EVENT_MAX_PAGE_SIZE) and ?cursor= of an event list request.
+
+    Raises ValueError for a bad limit.
+    """
+    try:
+        limit = int(request.GET.get("limit", settings.EVENT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("Limit must be an integer")
+    if limit < 1:
+        raise ValueError("Limit must be positive")
+    return min(limit, settings.EVENT_MAX_PAGE_SIZE), request.GET.get("cursor")
+
+async def event_list_response(request, queryset, window=None, feed=None):
+    """One keyset page of events as a plain list, with the next page's cursor in X-Next-Cursor.
+
+    With a ``window`` recurring events are expanded into their occurrences in it. ``feed`` is the (scope, year, month) of a monthly calendar feed; those pages
+    are served from the event feed cache with an ETag, or as 304 Not Modified.
+    Raises ValueError for a bad ?limit= or ?cursor=.
+    """
+    limit, cursor = page_params(request)
+
+    async def build():
+        if window:
+            # ✅ Series expansion merges several querysets in Python, so it runs on the sync thread
+            return await sync_to_async(window_page)(queryset, window, limit, cursor)
+        return await aevent_page(EventRowSerializer.rows(queryset), limit, cursor)
+
+    if feed is None:
+        rows, next_cursor = await build()
+        return paginated_response(JsonResponse(rows, encoder=JSONEncoder, safe=False), next_cursor)
+
+    entry = await acached_feed(*feed, f"{limit}:{cursor or ''}", build)
+    if etag_matches(request, entry["etag"]):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(entry["rows"], encoder=JSONEncoder, safe=False)
+    response["ETag"] = entry["etag"]
+    return paginated_response(response, entry["next_cursor"])
+
+def event_rows(queryset, window=None):
+    """All event rows in order: a window's occurrences, or every stored event streamed from the database.
+
+    A generator, so no query runs until the response is consumed (on the sync thread for async views).
+    """
+    if window:
+        yield from window_rows(queryset, *window)
+    else:
+        yield from EventRowSerializer.rows(queryset).order_by(*EVENT_ORDERING).iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
 
 # --- Django API Views ---
-class EventListCreateView(generics.ListCreateAPIView):
+class EventCreateView(generics.CreateAPIView):
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
     def create(self, request, *args, **kwargs):
@@ -89,33 +231,40 @@ class EventListCreateView(generics.ListCreateAPIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    def get_queryset(self):
-        """Filter events by club, year, and month"""
-        club_name = self.kwargs.get("club_name")  # ✅ Extract club_name from URL
-        year = self.kwargs.get("year")
-        month = self.kwargs.get("month")
-
-        # Get the club by name
-        club = get_object_or_404(Clubs, name=club_name)
 
-        # Filter events for the specified club, year, and month
-        return Event.objects.filter(club=club, date__year=year, date__month=month)
+create_event = EventCreateView.as_view()
 
-    def get(self, request, *args, **kwargs):
-        """Handle GET request with correct arguments"""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+@csrf_exempt
+@require_http_methods(["GET", "HEAD", "POST"])
+async def club_events(request, club_name, year=None, month=None):
+    """List a club's events for a month or ?start=&end= window; POST creates one (EventCreateView)."""
+    if request.method == "POST":
+        return await sync_to_async(create_event)(request, club_name=club_name)
+    return await club_event_feed(request, club_name, year, month)
+
+@jwt_required(stateless_reads=True)  # ✅ GETs authenticate from token claims alone
+async def club_event_feed(request, club_name, year=None, month=None):
+    club = await Clubs.objects.filter(name=club_name).only("id").afirst()
+    if club is None:
+        return JsonResponse({"error": "Club not found."}, status=404)
+    try:
+        queryset = Event.objects.select_related("club").filter(club=club)
+        window = event_window(request, year, month)
+        feed = (club.id, year, month) if year and month else None
+        return await event_list_response(request, queryset, window, feed)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
 class ClubMembersView(APIView):
     permission_classes = [IsAuthenticated]
+    stateless_reads = True
 
     def get(self, request, club_name):
         """Fetch all members of a club"""
         club = get_object_or_404(Clubs, name=club_name)
-        members = club.members.all()
-        
-        if not members.exists():
+        members = list(UserSerializer.setup_eager_loading(club.members.all()))
+
+        if not members:
             return Response({"message": "No members found"}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = UserSerializer(members, many=True)
@@ -131,13 +280,14 @@ class ClubMembersView(APIView):
 
         user = get_object_or_404(User, email=email)
 
-        if user not in club.members.all():
+        deleted, _ = Membership.objects.filter(club=club, user=user).delete()
+        if not deleted:
             return Response({"error": "User is not a member of this club"}, status=status.HTTP_400_BAD_REQUEST)
 
-        club.members.remove(user)
         return Response({"message": f"User {user.email} removed from {club.name}"}, status=status.HTTP_200_OK)
 class SearchUsersView(APIView):
     permission_classes = [IsAuthenticated]
+    stateless_reads = True
 
     def get(self, request):
         """Search users by name or email"""
@@ -145,9 +295,25 @@ class SearchUsersView(APIView):
         if not query:
             return Response({"error": "Query parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        users = User.objects.filter(email__icontains=query) | User.objects.filter(username__icontains=query)
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            limit = min(int(request.GET.get("limit", settings.USER_SEARCH_LIMIT)), settings.USER_SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "Limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "Limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user_ids, next_cursor = search_user_ids(query, limit, request.GET.get("cursor"))
+        except QueryError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ✅ Keep the index's ranking; the body stays a plain list for the typeahead
+        users = UserSerializer.setup_eager_loading(User.objects.filter(id__in=user_ids)).in_bulk()
+        serializer = UserSerializer([users[user_id] for user_id in user_ids if user_id in users], many=True)
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        if next_cursor:
+            response["X-Next-Cursor"] = next_cursor
+        return response
 
 class AddMemberView(APIView):
     permission_classes = [IsAuthenticated]
@@ -162,32 +328,193 @@ class AddMemberView(APIView):
 
         user = get_object_or_404(User, email=email)
 
-        if user in club.members.all():
+        # ✅ get_or_create falls back to a lookup if a concurrent request inserts the row first
+        _, created = Membership.objects.get_or_create(club=club, user=user)
+        if not created:
             return Response({"error": "User is already a member of this club"}, status=status.HTTP_400_BAD_REQUEST)
-
-        club.members.add(user)
         return Response({"message": f"User {user.email} added to {club.name}"}, status=status.HTTP_200_OK)
-class AllEventsView(generics.ListAPIView):
-    serializer_class = EventSerializer
 
-    def get_queryset(self):
+class BulkMembershipView(APIView):
+    """Add or remove many members at once, e.g. from an activities-office roster CSV."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, club_name):
         """
-        Returns all events in a given month & year.
-        Example: GET /events/?year=2025&month=2
+        JSON: {"action": "add" | "remove", "emails": [...]}
+        or multipart with a CSV `file` (an "email" column, or any cells that look like emails) and `action`.
         """
-        year = self.request.query_params.get("year")
-        month = self.request.query_params.get("month")
+        club = get_object_or_404(Clubs, name=club_name)
+        action = request.data.get("action", "add")
+        if action not in ("add", "remove"):
+            return Response({"error": "Action must be 'add' or 'remove'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if "file" in request.FILES:
+            try:
+                emails = read_roster_emails(request.FILES["file"])
+            except UnicodeDecodeError:
+                return Response({"error": "Roster must be a UTF-8 CSV file"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            emails = request.data.get("emails")
+            if not isinstance(emails, list):
+                return Response({"error": "Emails must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ✅ One entry per address whatever its case, keeping the roster's first spelling
+        unique = {}
+        for email in (str(email).strip() for email in emails):
+            if email:
+                unique.setdefault(email.lower(), email)
+        emails = list(unique.values())
+        if not emails:
+            return Response({"error": "At least one email is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = bulk_update_memberships(club, emails, action)
+        summary = {}
+        for outcome in results.values():
+            summary[outcome] = summary.get(outcome, 0) + 1
+        return Response({"club": club.name, "action": action, "summary": summary, "results": results}, status=status.HTTP_200_OK)
+@require_safe
+async def all_events(request):
+    """
+    Events a page at a time: for a given month & year, a start/end window or all of them.
+    ?stream=ndjson|json streams them all instead.
+    Example: GET /events/?year=2025&month=2
+             GET /events/?start=2025-02-23&end=2025-03-01
+    """
+    queryset = Event.objects.select_related("club")
+    try:
+        year, month = request.GET.get("year"), request.GET.get("month")
+        window = event_window(request, year, month)  # All events if no filters provided
+        fmt = stream_format(request)
+        if not fmt:
+            feed = (ALL_EVENTS, int(year), int(month)) if year and month else None
+            return await event_list_response(request, queryset, window, feed)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return streaming_json_response(event_rows(queryset, window), fmt, asynchronous=is_asgi(request))
+class EventImportView(APIView):
+    """Bulk-create a club's events from a CSV, JSON or iCalendar file."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, club_name):
+        """
+        Multipart `file` (.csv, .json or .ics; `type` overrides the extension), or a JSON body {"events": [...]}.
+        All rows are validated first; nothing is saved if any row is invalid.
+        """
+        club = get_object_or_404(Clubs, name=club_name)
+        upload = request.FILES.get("file")
+        try:
+            if upload:
+                fmt = request.data.get("type") or event_io.detect_format(upload.name, upload.content_type)
+                if fmt not in event_io.FORMATS:
+                    return Response({"error": "Unsupported file type. Use .csv, .json or .ics"}, status=status.HTTP_400_BAD_REQUEST)
+                rows = event_io.parse_events(upload.read().decode("utf-8-sig"), fmt)
+            else:
+                rows = event_io.parse_events(request.data, event_io.JSON)
+            created, errors = event_io.import_events(club, rows)
+        except UnicodeDecodeError:
+            return Response({"error": "File must be UTF-8 encoded"}, status=status.HTTP_400_BAD_REQUEST)
+        except event_io.EventImportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if errors:
+            return Response({"error": "Some events are invalid", "rows": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": f"Imported {created} events into {club.name}", "created": created}, status=status.HTTP_201_CREATED)
+
+class EventExportView(APIView):
+    """Stream everyone's or one club's events as .ics or .csv (?type=ics|csv; DRF reserves ?format=)."""
+    permission_classes = [AllowAny]  # ✅ Public, like the /api/events/ feed, so calendar apps can subscribe
+    stateless_reads = True
+
+    def get(self, request, club_name=None):
+        fmt = request.GET.get("type", event_io.ICS)
+        if fmt not in (event_io.ICS, event_io.CSV):
+            return Response({"error": "Type must be 'ics' or 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        events = Event.objects.all()
+        if club_name:
+            events = events.filter(club=get_object_or_404(Clubs, name=club_name))
+        try:
+            window = event_window(request, request.GET.get("year"), request.GET.get("month"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = event_rows(events, window)
+        filename = f"{club_name or 'events'}.{fmt}"
+        if fmt == event_io.ICS:
+            chunks, content_type = event_io.export_ics(rows, request.get_host()), "text/calendar; charset=utf-8"
+        else:
+            chunks, content_type = event_io.export_csv(rows), "text/csv; charset=utf-8"
+        return streaming_download(chunks, content_type, filename, asynchronous=is_asgi(request))
+
+class EventRecurrenceView(APIView):
+    """Make an event repeat weekly or monthly; its date is the first occurrence."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, event_id):
+        recurrence = get_object_or_404(EventRecurrence, event_id=event_id)
+        return Response(EventRecurrenceSerializer(recurrence).data, status=status.HTTP_200_OK)
+
+    def put(self, request, event_id):
+        """Create or replace the event's recurrence rule."""
+        event = get_object_or_404(Event, id=event_id)
+        if not event.date:
+            return Response({"error": "Only events with a date can repeat"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = EventRecurrenceSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        recurrence, _ = EventRecurrence.objects.update_or_create(event=event, defaults=serializer.validated_data)
+        return Response(EventRecurrenceSerializer(recurrence).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, event_id):
+        """Stop repeating; the event keeps only its first occurrence."""
+        recurrence = get_object_or_404(EventRecurrence, event_id=event_id)
+        recurrence.delete()
+        return Response({"message": "Recurrence removed"}, status=status.HTTP_200_OK)
+
+class EventExceptionView(APIView):
+    """Move, rename or cancel single occurrences of a recurring event."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, event_id):
+        recurrence = get_object_or_404(EventRecurrence, event_id=event_id)
+        return Response(EventExceptionSerializer(recurrence.exceptions.all(), many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request, event_id):
+        """Create or replace the exception for one occurrence (identified by `original_date`)."""
+        recurrence = get_object_or_404(EventRecurrence.objects.select_related("event"), event_id=event_id)
+        serializer = EventExceptionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        if not is_occurrence(recurrence, recurrence.event.date, data["original_date"]):
+            return Response({"error": "original_date is not an occurrence of this event"}, status=status.HTTP_400_BAD_REQUEST)
+        exception, _ = EventException.objects.update_or_create(
+            recurrence=recurrence, original_date=data.pop("original_date"), defaults=data
+        )
+        return Response(EventExceptionSerializer(exception).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, event_id):
+        """Restore an occurrence to the series' defaults."""
+        try:
+            original_date = parse_bound(request.data.get("original_date") or "")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        deleted, _ = EventException.objects.filter(recurrence__event_id=event_id, original_date=original_date).delete()
+        if not deleted:
+            return Response({"error": "No exception for that occurrence"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Occurrence restored"}, status=status.HTTP_200_OK)
 
-        if year and month:
-            return Event.objects.filter(date__year=year, date__month=month)
-        return Event.objects.all()  # Return all events if no filters provided
 class EventDetailView(APIView):
     """Retrieve, Update, or Delete an Event"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, event_id):
         """Get details of a single event."""
-        event = Event.objects.filter(id=event_id).first()
+        event = Event.objects.select_related("club").filter(id=event_id).first()
         if not event:
             return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -196,7 +523,7 @@ class EventDetailView(APIView):
 
     def put(self, request, event_id):
         """Update an existing event."""
-        event = Event.objects.filter(id=event_id).first()
+        event = Event.objects.select_related("club").filter(id=event_id).first()
         if not event:
             return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -209,7 +536,7 @@ class EventDetailView(APIView):
 
     def delete(self, request, event_id):
         """Delete an event."""
-        event = Event.objects.filter(id=event_id).first()
+        event = Event.objects.select_related("club").filter(id=event_id).first()
         if not event:
             return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -220,64 +547,35 @@ class RegisterView(APIView):
     
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
-        
-        if serializer.is_valid():
-            password = serializer.validated_data["password"]
-            password2 = request.data.get("password2")
+        if not serializer.is_valid():
+            # ✅ The serializer already checks matching passwords and unique username/email
+            first_error = next(iter(serializer.errors.values()))[0]
+            return Response({"error": str(first_error), "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-            # ✅ Ensure passwords match before proceeding
-            if password != password2:
-                return Response({"error": "Passwords do not match"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # ✅ Check if username or email already exists
-            if User.objects.filter(username=serializer.validated_data["username"]).exists():
-                return Response({"error": "Username already taken"}, status=status.HTTP_400_BAD_REQUEST)
-            if User.objects.filter(email=serializer.validated_data["email"]).exists():
-                return Response({"error": "Email already in use"}, status=status.HTTP_400_BAD_REQUEST)
-
-            try:
-                # ✅ Create user instance properly
-                user = User(
-                    username=serializer.validated_data["username"],
-                    email=serializer.validated_data["email"],
-                )
-                user.set_password(password)  # ✅ Use `set_password()` for security
-                user.save()
+        try:
+            with transaction.atomic():
+                user = serializer.save()  # ✅ Hashes the password once, single INSERT
 
-                # ✅ Assign Club if provided (fixing owner issue)
+                # ✅ Assign Club if provided; a new club is owned by the user
                 club_name = request.data.get("clubName", "").strip()
                 if club_name:
                     club, created = Clubs.objects.get_or_create(name=club_name, defaults={"owner": user})
-                    if created:
-                        club.owner = user  # Ensure the owner is set for new clubs
-                        club.save()
-                    user.clubs.add(club)  # ✅ Assign user to the club
-
-                # ✅ Refresh user from DB before authentication
-                user.refresh_from_db()
-
-                # ✅ Authenticate user immediately after registration
-                authenticated_user = authenticate(username=user.username, password=password)
-                if authenticated_user:
-                    token = get_tokens_for_user(authenticated_user)
-                    return Response(
-                        {
-                            "message": "User registered and logged in successfully",
-                            "user": UserSerializer(user).data,
-                            "token": token
-                        }, 
-                        status=status.HTTP_201_CREATED
+                    Membership.objects.create(
+                        user=user, club=club, role=Membership.OWNER if created else Membership.MEMBER
                     )
-                else:
-                    return Response({"error": "User created but authentication failed"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            except IntegrityError:
-                return Response(
-                    {"error": "An error occurred while creating the user"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-
-        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            # ✅ Lost a race with a concurrent signup for the same username or email
+            return Response({"error": "Username or email already in use"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ✅ Issue tokens for the user we just created; no second hash via authenticate()
+        return Response(
+            {
+                "message": "User registered and logged in successfully",
+                "user": UserSerializer(user).data,
+                "token": get_tokens_for_user(user)
+            }, 
+            status=status.HTTP_201_CREATED
+        )
 
 class LoginView(APIView):
     """User authentication and JWT token issuance."""
@@ -312,75 +610,110 @@ class UserDetailView(APIView):
         return Response(UserSerializer(request.user).data)
     
 
-class AnalyzeFormView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request):
-        if 'file' not in request.FILES:
-            return JsonResponse({'error': 'No file uploaded.'}, status=400)
-
-        file = request.FILES['file']
-        file_type = file.content_type
-        content = file.read()
-
-        try:
-            text = self.extract_text(content, file_type)
-            if not text.strip():
-                return JsonResponse({'error': 'No text extracted from file.'}, status=400)
-
-            prompt = self.generate_prompt(text)
-
-            # Load model and tokenizer
-            model, tokenizer = ModelLoader.get_model()
-            inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-
-            with torch.no_grad():
-                outputs = model.generate(
-                    inputs["input_ids"],
-                    max_new_tokens=500,
-                    temperature=0.7,
-                    top_p=0.95,
-                    do_sample=True
-                )
+@csrf_exempt
+@require_POST
+@jwt_required()
+async def analyze_form(request):
+    """Analyze an uploaded funding form, or queue it with ?async=1 and return a job id to poll."""
+    # ✅ Multipart parsing, extraction and inference are blocking; they run in the bounded executor
+    files, data = await run_blocking(lambda: (request.FILES, request.POST))
+    if 'file' not in files:
+        return JsonResponse({'error': 'No file uploaded.'}, status=400)
+
+    file = files['file']
+    file_type = file.content_type
 
-            response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    try:
+        text = await run_blocking(extract_form_text, file, file_type)
+        if not text.strip():
+            return JsonResponse({'error': 'No text extracted from file.'}, status=400)
 
+        # ✅ ?async=1 queues the analysis and returns a job id to poll
+        if request.GET.get("async") in ("1", "true"):
             try:
-                analysis = json.loads(response)  # ✅ Ensure valid JSON
-            except json.JSONDecodeError:
-                analysis = {
-                    "issues": ["Error parsing model response"],
-                    "recommendations": ["Please try again."]
-                }
-
-            return JsonResponse(analysis)
+                priority = int(data.get("priority", 0))
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'Priority must be an integer.'}, status=400)
+            priority = max(-10, min(priority, 10))
+            job = await jobs.aenqueue(text, request.user, priority=priority)
+            return JsonResponse(
+                {"job_id": job.id, "status": job.status, "status_url": f"jobs/{job.id}/"},
+                status=202,
+            )
 
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+        return JsonResponse(await aanalyze_form_text(text))
 
-    @staticmethod
-    def extract_text(file_content: bytes, file_type: str) -> str:
-        """Extract text from different file formats."""
-        try:
-            if file_type == "application/pdf":
-                pdf_reader = PdfReader(io.BytesIO(file_content))
-                return " ".join(page.extract_text() for page in pdf_reader.pages if page.extract_text())
+    except ModelServerError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
 
-            elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                doc = docx.Document(io.BytesIO(file_content))
-                return " ".join(paragraph.text for paragraph in doc.paragraphs)
+class AnalysisJobView(APIView):
+    """Poll the status and result of a queued form analysis."""
+    permission_classes = [IsAuthenticated]
 
-            return file_content.decode('utf-8')
+    def get(self, request, job_id):
+        job = get_object_or_404(AnalysisJob, id=job_id, user=request.user)
+        return Response(AnalysisJobSerializer(job).data)
+
+def job_event(job):
+    return f"event: status\ndata: {json.dumps(AnalysisJobSerializer(job).data, cls=DjangoJSONEncoder)}\n\n"
+
+@require_safe
+@jwt_required(stateless_reads=True)
+async def analysis_job_events(request, job_id):
+    """Stream a queued analysis's status changes as server-sent events."""
+    job = await AnalysisJob.objects.filter(id=job_id, user_id=request.user.id).afirst()
+    if job is None:
+        return JsonResponse({"error": "Job not found."}, status=404)
+    deadline = time.monotonic() + settings.ANALYSIS_JOB_SSE_TIMEOUT
+
+    def events(job):
+        while True:
+            yield job_event(job)
+            remaining = deadline - time.monotonic()
+            if job.status in jobs.TERMINAL_STATUSES or remaining <= 0:
+                return
+            job = jobs.wait_for_change(job, min(remaining, 15))
+
+    async def aevents(job):
+        # ✅ Under ASGI a waiting client holds no thread between polls
+        while True:
+            yield job_event(job)
+            remaining = deadline - time.monotonic()
+            if job.status in jobs.TERMINAL_STATUSES or remaining <= 0:
+                return
+            job = await jobs.await_change(job, min(remaining, 15))
+
+    response = StreamingHttpResponse(aevents(job) if is_asgi(request) else events(job), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+class AnalyzeFormMetricsView(APIView):
+    """Report batching metrics (queue depth, batch size, wait time) for form analysis."""
+    permission_classes = [IsAuthenticated]
 
-        except Exception as e:
-            return f"Error extracting text: {str(e)}"
+    def get(self, request):
+        if settings.MODEL_SERVER_SOCKET:
+            try:
+                return Response(ModelServerClient().health()["batching"])
+            except ModelServerError as e:
+                return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(get_scheduler().stats())
         
-@csrf_exempt
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
 def execute_sql_query(request):
-    """Execute SQL query from a POST request."""
-    if request.method != 'POST':
-        return JsonResponse({'error': 'Invalid request method. Only POST allowed.'}, status=405)
+    """Execute a read-only SQL query from a POST request; signed-in users only.
+
+    Results are paginated: pass the returned ``next_cursor`` back as ``cursor``
+    (with the same ``query``) to fetch the next page. With ?stream=ndjson|json
+    all rows (up to QUERY_MAX_ROWS) are streamed instead.
 
+    Optional fields: ``params`` (a list for ``?`` or an object for ``:name``
+    placeholders) and ``explain: true`` to include the query plan.
+    Password hashes and sessions cannot be read.
+    """
     try:
         data = json.loads(request.body)
         query = data.get("query")
@@ -389,7 +722,37 @@ def execute_sql_query(request):
         if not query:
             return JsonResponse({"error": "Missing required parameter: 'query'"}, status=400)
 
-        sql_result = fetch_data_from_sql(query, db_path)
+        try:
+            page_size = int(data["page_size"]) if data.get("page_size") else None
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "'page_size' must be an integer"}, status=400)
+        if page_size is not None and page_size < 1:
+            return JsonResponse({"error": "'page_size' must be positive"}, status=400)
+
+        params = data.get("params")
+        if params is not None and not isinstance(params, (list, dict)):
+            return JsonResponse({"error": "'params' must be a list or an object"}, status=400)
+
+        fmt = stream_format(request)
+        if fmt:
+            try:
+                columns, batches = stream_query(
+                    db_path,
+                    query,
+                    params=params,
+                    max_rows=settings.QUERY_MAX_ROWS,
+                    time_limit=settings.QUERY_TIME_LIMIT_MS / 1000,
+                    chunk_size=settings.STREAM_CHUNK_SIZE,
+                )
+            except QueryError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+            rows = (row for batch in batches for row in batch)
+            return streaming_json_response(rows, fmt, header={"columns": columns}, asynchronous=is_asgi(request))
+
+        sql_result = fetch_data_from_sql(
+            query, db_path, params=params, cursor=data.get("cursor"),
+            page_size=page_size, explain=bool(data.get("explain")),
+        )
         if "error" in sql_result:
             return JsonResponse({"error": sql_result["error"]}, status=400)
 
@@ -1,6 +1,9 @@
 import sqlite3
 
-conn = sqlite3.connect("nutrican_project.db")
+from api.db_tuning import tune
+
+# ✅ read_only keeps the committed data file in its rollback journal mode (no -wal/-shm files)
+conn = tune(sqlite3.connect("nutrican_project.db"), read_only=True)
 cursor = conn.cursor()
 
 cursor.execute("SELECT * FROM Athlete LIMIT 5;")
@@ -58,7 +58,7 @@ INSTALLED_APPS = [
 # ✅ Authentication settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',  # ✅ simplejwt validation without a user query per request
     ),
 }
 
@@ -79,6 +79,7 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # ✅ Allow frontend running on port 5173 (Vite)
     "http://127.0.0.1:5173",
 ]
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor"]  # ✅ Lets the frontend read pagination cursors
 # ✅ URL Configuration
 ROOT_URLCONF = 'myproject.urls'
 
@@ -108,8 +109,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
 'NAME': BASE_DIR / "db.sqlite3",
+        # ✅ Seconds to keep a connection open between requests (0 = close after each request).
+        # runserver starts a thread per request, so only enable this under gunicorn/uwsgi.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # ✅ Writers take the lock at BEGIN, so busy_timeout applies instead of failing on lock upgrade
+            'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
     }
 }
+
+# ✅ PRAGMAs for every SQLite connection (api/db_tuning.py)
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))
 AUTH_USER_MODEL = 'api.User'  # Replace 'yourapp' with your actual app name
 
 
@@ -130,6 +146,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ✅ Password hashing (PBKDF2 work factor is tunable; Django 5.1's default is 870000)
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '870000'))
+PASSWORD_HASHERS = [
+    'api.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # ✅ Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -146,6 +172,90 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 STATIC_URL = 'static/'
 
+# ✅ /api/query/ limits: rows per page, total rows per query and time per page
+QUERY_PAGE_SIZE = int(os.getenv('QUERY_PAGE_SIZE', '500'))
+QUERY_MAX_PAGE_SIZE = int(os.getenv('QUERY_MAX_PAGE_SIZE', '5000'))
+QUERY_MAX_ROWS = int(os.getenv('QUERY_MAX_ROWS', '50000'))
+QUERY_TIME_LIMIT_MS = int(os.getenv('QUERY_TIME_LIMIT_MS', '2000'))
+QUERY_STATEMENT_CACHE_SIZE = int(os.getenv('QUERY_STATEMENT_CACHE_SIZE', '128'))  # ✅ Prepared statements kept per connection
+
+# ✅ Rows fetched from the database per batch for ?stream=ndjson|json responses
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+
+# ✅ Longest ?start=&end= window the event endpoints accept
+EVENT_RANGE_MAX_DAYS = int(os.getenv('EVENT_RANGE_MAX_DAYS', '400'))
+
+# ✅ JWT user resolution (api/authentication.py)
+AUTH_USER_CACHE_SECONDS = int(os.getenv('AUTH_USER_CACHE_SECONDS', '60'))  # ✅ 0 disables the user cache
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_USER_CACHE_MAX_ENTRIES', '10000'))
+AUTH_STATELESS_READS = os.getenv('AUTH_STATELESS_READS', 'True') == 'True'  # ✅ Token-claims user for opted-in GET views
+
+# ✅ Cache (local memory per process by default; set CACHE_DIRECTORY to share a file cache between workers)
+CACHE_DIRECTORY = os.getenv('CACHE_DIRECTORY', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIRECTORY,
+    } if CACHE_DIRECTORY else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+EVENT_FEED_CACHE_SECONDS = int(os.getenv('EVENT_FEED_CACHE_SECONDS', '3600'))
+
+# ✅ Event list pages (next page cursor goes in the X-Next-Cursor header)
+EVENT_PAGE_SIZE = int(os.getenv('EVENT_PAGE_SIZE', '500'))
+EVENT_MAX_PAGE_SIZE = int(os.getenv('EVENT_MAX_PAGE_SIZE', '1000'))
+
+EVENT_IMPORT_MAX_ROWS = int(os.getenv('EVENT_IMPORT_MAX_ROWS', '5000'))  # ✅ Largest bulk event import
+
+# ✅ User typeahead search
+USER_SEARCH_LIMIT = int(os.getenv('USER_SEARCH_LIMIT', '20'))
+USER_SEARCH_MAX_LIMIT = int(os.getenv('USER_SEARCH_MAX_LIMIT', '100'))
+USER_SEARCH_CACHE_SECONDS = int(os.getenv('USER_SEARCH_CACHE_SECONDS', '30'))  # ✅ Repeated prefixes skip the index
+
+# ✅ Form analysis model
+MODEL_DIRECTORY = os.getenv('MODEL_DIRECTORY', str(BASE_DIR / 'flan-t5-local'))
+
+# Inference backend: 'torch' (fp32), 'int8' (dynamic int8 quantization) or
+# 'onnx' (ONNX Runtime; exported once to MODEL_ONNX_DIRECTORY, default '<MODEL_DIRECTORY>-onnx')
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+MODEL_ONNX_DIRECTORY = os.getenv('MODEL_ONNX_DIRECTORY', '')
+
+# Unix socket of the shared model server (`manage.py run_model_server`).
+# Leave empty to load the model inside each Django worker instead.
+MODEL_SERVER_SOCKET = os.getenv('MODEL_SERVER_SOCKET', '')
+MODEL_SERVER_TIMEOUT = float(os.getenv('MODEL_SERVER_TIMEOUT', '120'))
+
+# Micro-batching: wait up to this long for more requests, or until the batch is full
+ANALYZE_BATCH_WINDOW_MS = float(os.getenv('ANALYZE_BATCH_WINDOW_MS', '20'))
+ANALYZE_MAX_BATCH_SIZE = int(os.getenv('ANALYZE_MAX_BATCH_SIZE', '8'))
+ANALYZE_GENERATE_TIMEOUT = float(os.getenv('ANALYZE_GENERATE_TIMEOUT', '120'))  # ✅ Longest wait for a batched prompt
+
+# Prompts longer than this (or the tokenizer's limit) are split into chunks and
+# checked requirement by requirement
+ANALYZE_MAX_INPUT_TOKENS = int(os.getenv('ANALYZE_MAX_INPUT_TOKENS', '512'))
+
+# Asynchronous analysis jobs (`manage.py run_analysis_workers`)
+ANALYSIS_JOB_CONCURRENCY = int(os.getenv('ANALYSIS_JOB_CONCURRENCY', '2'))
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_JOB_MAX_ATTEMPTS', '3'))
+ANALYSIS_JOB_LEASE_SECONDS = int(os.getenv('ANALYSIS_JOB_LEASE_SECONDS', '60'))
+ANALYSIS_JOB_POLL_SECONDS = float(os.getenv('ANALYSIS_JOB_POLL_SECONDS', '1'))
+ANALYSIS_JOB_SSE_TIMEOUT = int(os.getenv('ANALYSIS_JOB_SSE_TIMEOUT', '300'))
+
+# Upload text extraction: stop after this many characters (0 = no limit) and
+# spread PDFs with at least EXTRACTION_PARALLEL_PAGES pages over a process pool
+EXTRACTION_CHAR_BUDGET = int(os.getenv('EXTRACTION_CHAR_BUDGET', '200000'))
+EXTRACTION_PARALLEL_PAGES = int(os.getenv('EXTRACTION_PARALLEL_PAGES', '30'))
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', '0'))  # 0 = one per CPU
+
+# ✅ Threads for blocking work (upload parsing, extraction, inference) started by async views
+ASYNC_EXECUTOR_WORKERS = int(os.getenv('ASYNC_EXECUTOR_WORKERS', '0'))  # 0 = one per CPU
+
+# Cache of analysis results keyed on form text, requirements version and model (empty path disables it)
+ANALYSIS_CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH', str(BASE_DIR / 'analysis_cache.sqlite3'))
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', str(7 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '1000'))
+
 # ✅ Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'